@@ -1,6 +1,9 @@
 from Vector2D import Vec2D
 from Graph import WeightedGraph
 from Constants import GlobalConstants
+from SpatialGrid import SpatialGrid
+from numpy import flatnonzero, minimum, maximum, errstate
+from math import sqrt
 
 
 class Link:
@@ -17,6 +20,14 @@ class Floor:
     def __init__(self, Empty=False):
         self.walls = WeightedGraph()
         self.links = []
+        # Grid of vertex ids so that vertices near a position can be found without checking every vertex; the cell size
+        # is the largest distance it is ever queried with
+        self.__vertex_grid = SpatialGrid(2 * GlobalConstants.NODE_RADIUS)
+        self.__vertex_grid_revision = -1
+        # Links get their own grid. Links can be popped from outside (e.g. by Map when pathfinding), so the grid keeps
+        # track of how many links it holds and is rebuilt if that no longer matches
+        self.__link_grid = SpatialGrid(2 * GlobalConstants.NODE_RADIUS)
+        self.__link_grid_size = 0
         if not Empty:
             self.walls.add_vertex(Vec2D(0, 0))
             self.walls.add_vertex(Vec2D(GlobalConstants.FLOOR_RATIO.x, 0))
@@ -36,7 +47,7 @@ class Floor:
 
     def add_wall(self, wall_start_pos, wall_end_pos):
         # Attempts to add a wall at the specified start and end positions and returns if it was successful
-        if Vec2D.squared_distance_between(wall_start_pos, wall_end_pos) < self.THRESHOLD_DIST:
+        if (wall_start_pos.x - wall_end_pos.x) ** 2 + (wall_start_pos.y - wall_end_pos.y) ** 2 < self.THRESHOLD_DIST:
             # Wall cannot have both vertices be too close
             return False
         wall_start_id = self.__place_vertex(wall_start_pos)
@@ -44,22 +55,23 @@ class Floor:
         # Checks for overlaps with other walls
         if self.check_for_intersections(self.walls, wall_start_id, wall_end_id):
             # Remove vertices of wall that were added
-            offset = int(self.__check_if_remove(wall_start_id))
-            self.__check_if_remove(wall_end_id - offset * int(wall_start_id < wall_end_id))
+            self.__remove_if_unconnected([wall_start_id, wall_end_id])
             return False
         else:
-            if (self.walls.vertex_positions[wall_start_id].x == self.walls.vertex_positions[wall_end_id].x == 0 or
-                    self.walls.vertex_positions[wall_start_id].x == self.walls.vertex_positions[wall_end_id].x ==
-                    GlobalConstants.FLOOR_RATIO.x or
-                    self.walls.vertex_positions[wall_start_id].y == self.walls.vertex_positions[wall_end_id].y == 0 or
-                    self.walls.vertex_positions[wall_start_id].y == self.walls.vertex_positions[wall_end_id].y ==
-                    GlobalConstants.FLOOR_RATIO.y):
+            if self.__get_edge_of_floor_flags(wall_start_id) & self.__get_edge_of_floor_flags(wall_end_id):
                 # If new wall is created on the edge of the floor
                 self.walls.set_edge(wall_start_id, wall_end_id, 2)
             else:
                 self.walls.set_edge(wall_start_id, wall_end_id, 1)
             return True
 
+    def __get_edge_of_floor_flags(self, vert_id):
+        # One bit for each edge of the floor the vertex is on, so two vertices are on the same edge of the floor if they
+        # have any bits in common
+        position = self.walls.vertex_positions[vert_id]
+        return ((position.x == 0) | (position.x == GlobalConstants.FLOOR_RATIO.x) << 1 | (position.y == 0) << 2 |
+                (position.y == GlobalConstants.FLOOR_RATIO.y) << 3)
+
     @staticmethod
     def check_for_intersections(walls, wall_start_id, wall_end_id, skip_case_1=False):
         # Checks for intersections of a new wall with all previously placed ones
@@ -69,31 +81,105 @@ class Floor:
         # Similarly to when adding a new vertex, the vertex intersection test must be considered first if it is being
         # used
         if not skip_case_1:
-            for vert_id in range(walls.vertices):
-                if vert_id not in (wall_start_id, wall_end_id):
-                    # Case 1
-                    # Wall intersects with circle if the distance to closest point to the center of said circle on the
-                    # wall from the center of the circle is less than or equal the radius
-                    vertex_pos = walls.vertex_positions[vert_id]
-                    wall_start_pos = walls.vertex_positions[wall_start_id]
-                    wall_end_pos = walls.vertex_positions[wall_end_id]
-                    clamped_closest = Vec2D.get_closest_point(wall_start_pos, wall_end_pos, vertex_pos)
-                    if (clamped_closest is not None and Vec2D.squared_distance_between(vertex_pos, clamped_closest) <=
-                            Floor.HALF_THRESHOLD_DIST):
-                        return True
-        for vert1_id in range(walls.vertices):
-            # Case 2
-            for vert2_id in range(vert1_id):
-                if walls.get_edge(vert1_id, vert2_id) and not (vert1_id in (wall_start_id, wall_end_id) or
-                                                               vert2_id in (wall_start_id, wall_end_id)):
-                    intersection = Vec2D.intersect(walls.vertex_positions[vert1_id],
-                                                   walls.vertex_positions[vert2_id],
-                                                   walls.vertex_positions[wall_start_id],
-                                                   walls.vertex_positions[wall_end_id])
-                    if intersection[0]:
-                        return True
-        # Otherwise, no intersections
-        return False
+            # Case 1
+            # Wall intersects with circle if the distance to closest point to the center of said circle on the wall from
+            # the center of the circle is less than or equal the radius
+            # This is done for every vertex at once with NumPy by projecting all the vertex positions onto the wall
+            positions = walls.positions
+            wall_start_pos = positions[wall_start_id]
+            wall_vec = positions[wall_end_id] - wall_start_pos
+            wall_squared_length = wall_vec @ wall_vec
+            if wall_squared_length > 0:
+                # How far along the wall the closest point on the (infinite) line of the wall is to each vertex
+                lerp_factors = ((positions - wall_start_pos) @ wall_vec) / wall_squared_length
+                closest_positions = wall_start_pos + lerp_factors[:, None] * wall_vec
+                squared_dists = ((positions - closest_positions) ** 2).sum(1)
+                # Like get_closest_point, the closest point only counts if it is within the wall
+                intersecting = (lerp_factors >= 0) & (lerp_factors <= 1) & (squared_dists <= Floor.HALF_THRESHOLD_DIST)
+                intersecting[[wall_start_id, wall_end_id]] = False
+                if intersecting.any():
+                    return True
+        # Case 2
+        positions = walls.positions
+        # Walls sharing a vertex with the new wall do not count
+        return Floor.check_segment_for_intersections(walls, positions[wall_start_id], positions[wall_end_id],
+                                                     ignored_vert_ids=(wall_start_id, wall_end_id))
+
+    @staticmethod
+    def check_segment_for_intersections(walls, new_start, new_end, ignored_vert_ids=()):
+        # Checks whether a wall from new_start to new_end (NumPy arrays) intersects with any of the walls, without it
+        # having to be added to them first. Walls with a vertex in ignored_vert_ids do not count
+        # Most walls are nowhere near the new one, so first all walls whose bounding boxes do not overlap with the new
+        # wall's are thrown out at once with NumPy. Vec2D.intersect rejects these anyway, so the same strict
+        # comparisons are used. The rest of Vec2D.intersect is then done for all the remaining walls at once as well
+        # Everything about the walls themselves is cached by the walls graph, so only the new wall is worked out here
+        segments = walls.get_edge_segments()
+        mins = segments.mins
+        maxs = segments.maxs
+        new_min = minimum(new_start, new_end)
+        new_max = maximum(new_start, new_end)
+        candidates = ((mins[:, 0] < new_max[0]) & (maxs[:, 0] > new_min[0]) & (mins[:, 1] < new_max[1]) &
+                      (maxs[:, 1] > new_min[1]))
+        for vert_id in ignored_vert_ids:
+            candidates &= (segments.vert1_ids != vert_id) & (segments.vert2_ids != vert_id)
+        if not candidates.any():
+            return False
+        vecs = segments.vecs[candidates]
+        new_vec = new_end - new_start
+        if new_vec[0] == 0 or (vecs[:, 0] == 0).any():
+            # Vertical walls with overlapping ranges always count as intersecting
+            return True
+        # Rise over run, and extrapolate from start pos to x=0
+        grads = segments.grads[candidates]
+        intercepts = segments.intercepts[candidates]
+        new_grad = new_vec[1] / new_vec[0]
+        new_intercept = new_start[1] - new_start[0] * new_grad
+        parallel = grads == new_grad
+        if (parallel & (intercepts == new_intercept)).any():
+            return True
+        # Found by equating line equations y = mx + c and solving for x; parallel walls divide by 0 here but they are
+        # ignored anyway
+        with errstate(divide="ignore", invalid="ignore"):
+            intersect_xs = (new_intercept - intercepts) / (grads - new_grad)
+        intersect_ys = grads * intersect_xs + intercepts
+        # Intersection must be within the ranges of both walls
+        min_bounds = maximum(mins[candidates], new_min)
+        max_bounds = minimum(maxs[candidates], new_max)
+        intersecting = (~parallel & (intersect_xs >= min_bounds[:, 0]) & (intersect_xs <= max_bounds[:, 0]) &
+                        (intersect_ys >= min_bounds[:, 1]) & (intersect_ys <= max_bounds[:, 1]))
+        return bool(intersecting.any())
+
+    @staticmethod
+    def check_segments_for_intersections(walls, new_starts, new_ends):
+        # Same as check_segment_for_intersections, but for many new walls at once, from each row of the (n, 2) array
+        # new_starts to the same row of new_ends. Returns an array of whether each one intersects with any of the walls
+        # Every new wall is compared with every wall at once, with NumPy broadcasting a row for each new wall against a
+        # column for each wall, so the early returns become parts of one condition
+        segments = walls.get_edge_segments()
+        mins = segments.mins
+        maxs = segments.maxs
+        grads = segments.grads
+        intercepts = segments.intercepts
+        new_mins = minimum(new_starts, new_ends)[:, None]
+        new_maxs = maximum(new_starts, new_ends)[:, None]
+        candidates = ((mins[:, 0] < new_maxs[:, :, 0]) & (maxs[:, 0] > new_mins[:, :, 0]) &
+                      (mins[:, 1] < new_maxs[:, :, 1]) & (maxs[:, 1] > new_mins[:, :, 1]))
+        new_vecs = new_ends - new_starts
+        # Vertical walls with overlapping ranges always count as intersecting
+        vertical = (new_vecs[:, 0] == 0)[:, None] | (segments.vecs[:, 0] == 0)
+        # Vertical walls divide by 0 here but they already count as intersecting
+        with errstate(divide="ignore", invalid="ignore"):
+            new_grads = (new_vecs[:, 1] / new_vecs[:, 0])[:, None]
+            new_intercepts = new_starts[:, 1, None] - new_starts[:, 0, None] * new_grads
+            parallel = grads == new_grads
+            intersect_xs = (new_intercepts - intercepts) / (grads - new_grads)
+            intersect_ys = grads * intersect_xs + intercepts
+        min_bounds = maximum(mins, new_mins)
+        max_bounds = minimum(maxs, new_maxs)
+        crossing = (~parallel & (intersect_xs >= min_bounds[:, :, 0]) & (intersect_xs <= max_bounds[:, :, 0]) &
+                    (intersect_ys >= min_bounds[:, :, 1]) & (intersect_ys <= max_bounds[:, :, 1]))
+        intersecting = candidates & (vertical | (parallel & (intercepts == new_intercepts)) | crossing)
+        return intersecting.any(axis=1)
 
     def __place_vertex(self, new_vert_pos):
         # 3 potential cases placing a vertex
@@ -101,32 +187,76 @@ class Floor:
         # 2) Split existing wall,
         # 3) Create entirely new vertex
         # Returns vert id of the placed vertex
-        for vert_id in range(self.walls.vertices):
-            # Case 1
-            if (Vec2D.squared_distance_between(self.walls.vertex_positions[vert_id], new_vert_pos) <
-                    self.THRESHOLD_DIST):
-                return vert_id
-        for vert1_id in range(self.walls.vertices):
-            # Case 2
-            for vert2_id in range(vert1_id):
-                if self.walls.get_edge(vert1_id, vert2_id):
-                    # Gets closest point on the line of the edge
-                    clamped_vert_pos = Vec2D.get_closest_point(self.walls.vertex_positions[vert1_id],
-                                                               self.walls.vertex_positions[vert2_id], new_vert_pos)
-                    if (clamped_vert_pos is not None and
-                            Vec2D.squared_distance_between(clamped_vert_pos, new_vert_pos) < self.HALF_THRESHOLD_DIST):
-                        # If this is not the case, and case 1 has failed, then the point cannot be less than the
-                        # threshold distance away from the wall (and consequently the half threshold distance as well)
-                        self.__split_wall(clamped_vert_pos, vert1_id, vert2_id)
-                        return self.walls.vertices - 1
+        # Case 1
+        vert_id = self.__find_vertex_within(new_vert_pos, self.THRESHOLD_DIST)
+        if vert_id != -1:
+            return vert_id
+        # Plain coordinates are used in the loops so no Vec2Ds are created for every wall checked
+        new_vert_x = new_vert_pos.x
+        new_vert_y = new_vert_pos.y
+        vertex_positions = self.walls.vertex_positions
+        # Case 2
+        # Only walls near enough to possibly be split need checking, rather than every pair of vertices
+        for vert1_id, vert2_id in self.__find_walls_near(new_vert_pos, self.HALF_THRESHOLD_DIST):
+            # Gets closest point on the line of the edge
+            vert1_pos = vertex_positions[vert1_id]
+            vert2_pos = vertex_positions[vert2_id]
+            clamped_vert_pos = Vec2D.get_closest_point_xy(vert1_pos.x, vert1_pos.y, vert2_pos.x, vert2_pos.y,
+                                                          new_vert_x, new_vert_y)
+            if (clamped_vert_pos is not None and (clamped_vert_pos[0] - new_vert_x) ** 2 +
+                    (clamped_vert_pos[1] - new_vert_y) ** 2 < self.HALF_THRESHOLD_DIST):
+                # If this is not the case, and case 1 has failed, then the point cannot be less than the threshold
+                # distance away from the wall (and consequently the half threshold distance as well)
+                self.__split_wall(Vec2D(clamped_vert_pos[0], clamped_vert_pos[1]), vert1_id, vert2_id)
+                return self.walls.vertices - 1
         # Case 3
-        self.walls.add_vertex(new_vert_pos)
+        self.__add_vertex(new_vert_pos)
         return self.walls.vertices - 1
 
+    def __find_vertex_within(self, position, threshold_dist, start_id=0):
+        # Returns the id of the first vertex (from start_id onwards) with a squared distance from position less than
+        # threshold_dist, or -1 if there is none
+        # Only vertices in the grid cells around position need to be checked
+        self.__update_vertex_grid()
+        vertex_positions = self.walls.vertex_positions
+        x = position.x
+        y = position.y
+        close_vert_ids = [vert_id for vert_id in self.__vertex_grid.query(position) if vert_id >= start_id and
+                          (vertex_positions[vert_id].x - x) ** 2 + (vertex_positions[vert_id].y - y) ** 2 <
+                          threshold_dist]
+        if len(close_vert_ids) == 0:
+            return -1
+        return min(close_vert_ids)
+
+    def __update_vertex_grid(self):
+        # The grid is kept up to date by __add_vertex and __delete_vertices, but vertices can also be added to the walls
+        # graph from outside (e.g. when loading a map), in which case the grid must be rebuilt
+        if self.__vertex_grid_revision != self.walls.vertex_revision:
+            self.__vertex_grid.clear()
+            for vert_id, position in enumerate(self.walls.vertex_positions):
+                self.__vertex_grid.insert(vert_id, position)
+            self.__vertex_grid_revision = self.walls.vertex_revision
+
+    def __add_vertex(self, position):
+        self.__update_vertex_grid()
+        self.walls.add_vertex(position)
+        self.__vertex_grid.insert(self.walls.vertices - 1, position)
+        self.__vertex_grid_revision = self.walls.vertex_revision
+
+    def __delete_vertices(self, vert_ids):
+        self.__update_vertex_grid()
+        for vert_id in vert_ids:
+            self.__vertex_grid.remove(vert_id, self.walls.vertex_positions[vert_id])
+        # Must go from the highest id down so the ids still to be shifted are correct
+        for vert_id in sorted(vert_ids, reverse=True):
+            self.__vertex_grid.shift_ids_down(vert_id)
+        self.walls.delete_vertices(vert_ids)
+        self.__vertex_grid_revision = self.walls.vertex_revision
+
     def __split_wall(self, split_pos, vert1_id, vert2_id):
         # If the wall type is an outer wall, both new split walls must be the same
         old_val = self.walls.get_edge_val(vert1_id, vert2_id)
-        self.walls.add_vertex(split_pos)
+        self.__add_vertex(split_pos)
         self.walls.set_edge(vert1_id, vert2_id, 0)
         self.walls.set_edge(vert1_id, self.walls.vertices - 1, old_val)
         self.walls.set_edge(vert2_id, self.walls.vertices - 1, old_val)
@@ -136,68 +266,98 @@ class Floor:
         # Case 1 - Delete link
         # Case 2 - Delete vertex (and all walls connected to it and all vertices that are only connected to those walls)
         # Case 3 - delete wall (and all vertices that are only connected to it)
-        for link_num in range(len(self.links)):
-            # Case 1
-            if Vec2D.squared_distance_between(self.links[link_num].position, delete_pos) < self.HALF_THRESHOLD_DIST:
-                self.links.pop(link_num)
-                # Should only delete one element at a time
-                return
+        # Case 1
+        self.__update_link_grid()
+        delete_x = delete_pos.x
+        delete_y = delete_pos.y
+        close_link_nums = [link_num for link_num in self.__link_grid.query(delete_pos) if
+                           (self.links[link_num].position.x - delete_x) ** 2 +
+                           (self.links[link_num].position.y - delete_y) ** 2 < self.HALF_THRESHOLD_DIST]
+        if close_link_nums:
+            link_num = min(close_link_nums)
+            self.__link_grid.remove(link_num, self.links[link_num].position)
+            self.__link_grid.shift_ids_down(link_num)
+            self.links.pop(link_num)
+            self.__link_grid_size -= 1
+            # Should only delete one element at a time
+            return
+        # Case 2
         # Start at 4 as corner vertices cannot be deleted
-        for vert_id in range(4, self.walls.vertices):
-            # Case 2
-            if (Vec2D.squared_distance_between(self.walls.vertex_positions[vert_id], delete_pos) <
-                    self.HALF_THRESHOLD_DIST):
-                to_check = []
-                edge_vertex = False
-                edge1_vert = -1
-                edge2_vert = -1
-                for vert2_id in range(self.walls.vertices):
-                    if self.walls.get_edge_val(vert_id, vert2_id) == 2:
-                        if edge_vertex:
-                            # There will always be 2 outer edges connected to an edge vertex
-                            edge2_vert = vert2_id
-                        else:
-                            edge_vertex = True
-                            edge1_vert = vert2_id
-                    elif self.walls.get_edge(vert_id, vert2_id):
-                        to_check.append(vert2_id)
-                if edge_vertex:
-                    # If edge vertex, edge must be repaired
-                    self.walls.set_edge(edge1_vert, edge2_vert, 2)
-                self.walls.delete_vertex(vert_id)
-                to_check.sort()
-                # As vertices are deleted, the next vertex indices must be decreased to their new one
-                index_offset = 0
-                for each in to_check:
-                    index_offset += int(self.__check_if_remove(each-index_offset-int(each > vert_id)))
-                return
-        for vert1_id in range(self.walls.vertices):
+        vert_id = self.__find_vertex_within(delete_pos, self.HALF_THRESHOLD_DIST, 4)
+        if vert_id != -1:
+            to_check = []
+            edge_vertex = False
+            edge1_vert = -1
+            edge2_vert = -1
+            for vert2_id in self.walls.get_neighbours(vert_id):
+                if self.walls.get_edge_val(vert_id, vert2_id) == 2:
+                    if edge_vertex:
+                        # There will always be 2 outer edges connected to an edge vertex
+                        edge2_vert = vert2_id
+                    else:
+                        edge_vertex = True
+                        edge1_vert = vert2_id
+                else:
+                    to_check.append(vert2_id)
+            if edge_vertex:
+                # If edge vertex, edge must be repaired
+                self.walls.set_edge(edge1_vert, edge2_vert, 2)
+            # Vertices that were only connected to the deleted vertex will have no walls left, so are deleted too. These
+            # are all deleted together so there is no need to keep track of how the ids shift after each deletion
+            to_delete = [vert_id]
+            for each in to_check:
+                if self.walls.get_neighbours(each) == [vert_id]:
+                    to_delete.append(each)
+            self.__delete_vertices(to_delete)
+            return
+        for vert1_id, vert2_id in self.__find_walls_near(delete_pos, self.HALF_THRESHOLD_DIST):
             # Case 3
-            for vert2_id in range(vert1_id):
-                # Outer edges cannot be deleted
-                if self.walls.get_edge_val(vert1_id, vert2_id) == 1:
-                    # Gets closest point on the line of the edge
-                    clamped_vert_pos = Vec2D.get_closest_point(self.walls.vertex_positions[vert1_id],
-                                                               self.walls.vertex_positions[vert2_id], delete_pos)
-                    if (clamped_vert_pos is not None and Vec2D.squared_distance_between(clamped_vert_pos, delete_pos) <
-                            self.HALF_THRESHOLD_DIST):
-                        # If this is not the case, and case 1 has failed, then the delete position cannot be less than
-                        # the threshold distance away from the wall (and consequently the half threshold distance as
-                        # well)
-                        self.walls.set_edge(vert1_id, vert2_id, 0)
-                        offset = int(self.__check_if_remove(vert1_id))
-                        self.__check_if_remove(vert2_id - offset * int(vert1_id < vert2_id))
-                        return
-
-    def __check_if_remove(self, vert_id):
-        # Checks if there are no edges connected to the given vertex
-        # Returns if it is removed or not
-        for vert2_id in range(self.walls.vertices):
-            if self.walls.get_edge(vert_id, vert2_id):
-                return False
-        else:
-            self.walls.delete_vertex(vert_id)
-            return True
+            # Outer edges cannot be deleted
+            if self.walls.get_edge_val(vert1_id, vert2_id) == 1:
+                # Gets closest point on the line of the edge
+                vert1_pos = self.walls.vertex_positions[vert1_id]
+                vert2_pos = self.walls.vertex_positions[vert2_id]
+                clamped_vert_pos = Vec2D.get_closest_point_xy(vert1_pos.x, vert1_pos.y, vert2_pos.x, vert2_pos.y,
+                                                              delete_x, delete_y)
+                if (clamped_vert_pos is not None and (clamped_vert_pos[0] - delete_x) ** 2 +
+                        (clamped_vert_pos[1] - delete_y) ** 2 < self.HALF_THRESHOLD_DIST):
+                    # If this is not the case, and case 1 has failed, then the delete position cannot be less than the
+                    # threshold distance away from the wall (and consequently the half threshold distance as well)
+                    self.walls.set_edge(vert1_id, vert2_id, 0)
+                    self.__remove_if_unconnected([vert1_id, vert2_id])
+                    return
+
+    def __find_walls_near(self, position, threshold_dist):
+        # Returns a list of (vert1_id, vert2_id) for every wall that could be within the square root of threshold_dist
+        # of position, in the same order as looping over vert1 and then every vert2 < vert1
+        # Anything closer than that must be within that distance of the wall's bounding box, so all the other walls
+        # can be thrown out at once with NumPy; the walls returned still need their actual distance checking
+        # The walls' bounding boxes are cached by the walls graph
+        radius = sqrt(threshold_dist)
+        segments = self.walls.get_edge_segments()
+        mins = segments.mins - radius
+        maxs = segments.maxs + radius
+        near = ((mins[:, 0] <= position.x) & (maxs[:, 0] >= position.x) & (mins[:, 1] <= position.y) &
+                (maxs[:, 1] >= position.y))
+        return [(int(segments.vert1_ids[edge_num]), int(segments.vert2_ids[edge_num]))
+                for edge_num in flatnonzero(near)]
+
+    def __remove_if_unconnected(self, vert_ids):
+        # Deletes any of the given vertices that have no edges connected to them
+        # They are deleted together so the ids of the others do not need adjusting as each one is deleted
+        to_delete = [vert_id for vert_id in set(vert_ids) if not self.walls.get_neighbours(vert_id)]
+        if to_delete:
+            self.__delete_vertices(to_delete)
+
+    def __update_link_grid(self):
+        if self.__link_grid_size != len(self.links):
+            self.__link_grid.clear()
+            for link_num, link in enumerate(self.links):
+                self.__link_grid.insert(link_num, link.position)
+            self.__link_grid_size = len(self.links)
 
     def add_link(self, link_id, position):
+        self.__update_link_grid()
         self.links.append(Link(link_id, position))
+        self.__link_grid.insert(len(self.links) - 1, position)
+        self.__link_grid_size += 1
@@ -1,7 +1,14 @@
 from SquareMatrix import SquareMat
-from Queue import DynamicQueue, DynamicPriorityQueue
-from Stack import DynamicStack
-from Vector2D import Vec2D
+from Queue import DynamicBinaryHeap
+from math import sqrt
+from numpy import empty, array, full, zeros, flatnonzero, lexsort, int8, minimum, maximum, errstate
+from heapq import heappush, heappop
+from collections import namedtuple
+
+
+# The edges of a graph as line segments, see Graph.get_edge_segments (this is outside the class so graphs can still be
+# pickled)
+EdgeSegments = namedtuple("EdgeSegments", "vert1_ids vert2_ids starts vecs mins maxs grads intercepts")
 
 
 class Graph:
@@ -10,84 +17,340 @@ class Graph:
             # Avoids mutable default
             vertex_positions = []
         # Edges are stored in an adjacency matrix with 1 representing an edge and 0 representing no edge
-        self._adjacency_matrix = SquareMat(len(vertex_positions))
+        # The exact edge values are kept in the neighbour dictionaries below, and the matrix is only ever used to check
+        # which edges exist, so it just stores the sign of each value (-1 for blocked edges) as one byte per cell rather
+        # than an eight byte float
+        self._adjacency_matrix = SquareMat(len(vertex_positions), dtype=int8)
+        # The matrix alone means every search has to check every vertex to find the neighbours of the current one, which
+        # is really slow for sparse graphs (pretty much every graph in my program), so I also keep a dictionary of
+        # neighbour: edge value pairs for each vertex which is kept in sync with the matrix
+        self._adj = [{} for _ in range(len(vertex_positions))]
+        # Counting edges by scanning the whole matrix is O(V^2), so a running count is kept instead
+        self._edge_count = 0
+        # Incremented every time the graph changes so anything derived from the graph can be cached until it changes
+        self._revision = 0
+        # Same as above but only incremented when vertices are added or deleted
+        self._vertex_revision = 0
+        self.__edge_arrays = dict()
+        self.__edge_arrays_revision = -1
+        self.__edge_segments = dict()
+        self.__edge_segments_revision = -1
+        self.__successors = None
+        self.__successors_revision = -1
+        self.__predecessors = None
+        self.__predecessors_revision = -1
         # Technically the abstract data structure of a graph does not involve storing positions of vertices, but for
         # every graph in my program, vertex positions are required, so it does not make much sense to add an extra layer
         # of composition here
         self.vertex_positions = vertex_positions
+        # The positions are also stored in a NumPy array so distance checks over all vertices can be vectorised. The
+        # array has spare capacity which is doubled when it runs out so adding a vertex does not copy the whole thing
+        self._positions = empty((max(len(vertex_positions), 4), 2))
+        for vert_id, position in enumerate(vertex_positions):
+            self._positions[vert_id] = position.x, position.y
 
     @property
     def vertices(self):
         # Returns the number of vertices in the graph
         return len(self.vertex_positions)
 
+    @property
+    def revision(self):
+        # Changes whenever the graph is edited in any way
+        return self._revision
+
+    @property
+    def vertex_revision(self):
+        # Changes whenever a vertex is added or deleted
+        return self._vertex_revision
+
+    @property
+    def positions(self):
+        # Returns an (n, 2) array of the vertex positions - this is a view so should not be edited
+        return self._positions[:self.vertices]
+
     @property
     def edges(self):
         # Returns the number of edges in the graph
-        count = 0
-        for vert1_id in range(self.vertices):
-            for vert2_id in range(self.vertices):
-                if self.get_edge(vert1_id, vert2_id):
-                    count += 1
-        return count
+        return self._edge_count
 
     def add_vertex(self, position):
+        self._revision += 1
+        self._vertex_revision += 1
         self._adjacency_matrix.expand()
+        self._adj.append({})
+        if self.vertices == len(self._positions):
+            new_positions = empty((2 * len(self._positions), 2))
+            new_positions[:self.vertices] = self._positions
+            self._positions = new_positions
+        self._positions[self.vertices] = position.x, position.y
         self.vertex_positions.append(position)
 
     def get_edge(self, vert1_id, vert2_id):
-        if self._adjacency_matrix.get_item(vert1_id, vert2_id) < 0:
+        # Edge values are read from the neighbour dictionaries rather than the matrix as they hold the exact values that
+        # were set (the matrix only stores the sign of each value)
+        if self._adj[vert1_id].get(vert2_id, 0) < 0:
             # Negative weights also count as non-existent
             return False
         else:
-            return bool(self._adjacency_matrix.get_item(vert1_id, vert2_id))
+            return bool(self._adj[vert1_id].get(vert2_id, 0))
 
     def set_edge(self, vert1_id, vert2_id, new_edge_val, bi_directional=True):
-        self._adjacency_matrix.set_item(vert1_id, vert2_id, new_edge_val, mirrored=bi_directional)
+        self._adjacency_matrix.set_item(vert1_id, vert2_id, self._edge_sign(new_edge_val), mirrored=bi_directional)
+        self._update_adj(vert1_id, vert2_id, new_edge_val, bi_directional)
+
+    def set_edges(self, vert1_ids, vert2_id, new_edge_vals, bi_directional=True):
+        # Sets the edges from every vertex in vert1_ids to vert2_id, new_edge_vals being the list of values for each
+        # This is the same as calling set_edge for each of them, but the matrix is updated for all of them at once and
+        # the graph only counts as changing once
+        if not vert1_ids:
+            return
+        self._adjacency_matrix.set_items(vert1_ids, vert2_id, [self._edge_sign(edge_val) for edge_val in
+                                                               new_edge_vals], mirrored=bi_directional)
+        self._revision += 1
+        for vert1_id, new_edge_val in zip(vert1_ids, new_edge_vals):
+            self.__set_adj_entry(vert1_id, vert2_id, new_edge_val)
+            if bi_directional:
+                self.__set_adj_entry(vert2_id, vert1_id, new_edge_val)
+
+    def set_edge_pairs(self, vert1_ids, vert2_ids, new_edge_vals, bi_directional=True):
+        # Sets the edge from vert1_ids[i] to vert2_ids[i] for every i, new_edge_vals being the list of values for each
+        # Like set_edges, this is the same as calling set_edge for each of them, but the matrix is updated all at once
+        if not vert1_ids:
+            return
+        self._revision += 1
+        adj = self._adj
+        for vert1_id, vert2_id, new_edge_val in zip(vert1_ids, vert2_ids, new_edge_vals):
+            self.__set_adj_entry(vert1_id, vert2_id, new_edge_val)
+            if bi_directional:
+                self.__set_adj_entry(vert2_id, vert1_id, new_edge_val)
+        # The matrix is set from the dictionaries once they are done, so if the same pair is given more than once it
+        # still ends up with the last value, like it would with set_edge
+        self._adjacency_matrix.set_item_pairs(vert1_ids, vert2_ids, [
+            self._edge_sign(adj[vert1_id].get(vert2_id, 0)) for vert1_id, vert2_id in zip(vert1_ids, vert2_ids)],
+            mirrored=False)
+        if bi_directional:
+            self._adjacency_matrix.set_item_pairs(vert2_ids, vert1_ids, [
+                self._edge_sign(adj[vert2_id].get(vert1_id, 0)) for vert1_id, vert2_id in zip(vert1_ids, vert2_ids)],
+                mirrored=False)
+
+    @staticmethod
+    def _edge_sign(edge_val):
+        # Value stored in the matrix for an edge value; anything that is neither positive nor 0 (including NaN) is
+        # stored as -1, so it is non-zero but not an edge, the same as it is in the dictionaries
+        if edge_val > 0:
+            return 1
+        elif edge_val == 0:
+            return 0
+        else:
+            return -1
+
+    def _update_adj(self, vert1_id, vert2_id, new_edge_val, bi_directional):
+        # Keeps the neighbour dictionaries and edge count in sync with the matrix
+        self._revision += 1
+        self.__set_adj_entry(vert1_id, vert2_id, new_edge_val)
+        if bi_directional:
+            self.__set_adj_entry(vert2_id, vert1_id, new_edge_val)
+
+    def __set_adj_entry(self, vert1_id, vert2_id, new_edge_val):
+        # Like get_edge, negative values do not count as edges
+        old_edge_val = self._adj[vert1_id].get(vert2_id, 0)
+        self._edge_count += (new_edge_val > 0) - (old_edge_val > 0)
+        if new_edge_val:
+            self._adj[vert1_id][vert2_id] = new_edge_val
+        else:
+            # 0 means no edge so the entry is removed
+            self._adj[vert1_id].pop(vert2_id, None)
 
     def create_edge(self, vert1_pos, vert2_pos, new_edge_val=True):
         self.add_vertex(vert1_pos)
         self.add_vertex(vert2_pos)
         self.set_edge(self.vertices - 2, self.vertices - 1, new_edge_val)
 
+    def get_neighbours(self, vert_id):
+        # Returns a list of the vertices that there are edges to from vert_id
+        return [next_vert for next_vert, edge_val in self._adj[vert_id].items() if edge_val > 0]
+
+    def get_edge_vals_from(self, vert_id):
+        # Returns a list of (next_vert, edge_val) tuples for every edge value from vert_id that is not 0 (including
+        # negative ones), ordered by next_vert like looping over the row of the matrix would
+        return sorted(self._adj[vert_id].items())
+
+    def iter_edges(self):
+        # Yields (vert1_id, vert2_id, edge_val) for every edge value that is not 0 (including negative ones), ordered
+        # by vert1 and then vert2 like looping over the whole matrix would, but only going through the edges that exist
+        for vert1_id in range(self.vertices):
+            for vert2_id, edge_val in self.get_edge_vals_from(vert1_id):
+                yield vert1_id, vert2_id, edge_val
+
     def delete_vertex(self, vert_id):
-        self._adjacency_matrix.delete_row_column(vert_id)
-        self.vertex_positions.pop(vert_id)
+        self.delete_vertices([vert_id])
+
+    def truncate(self, vertices):
+        # Deletes every vertex with an id of vertices or higher. No remaining vertex has to be renumbered, so only the
+        # edges to the deleted vertices need removing, rather than every neighbour dictionary being rebuilt like in
+        # delete_vertices
+        self._revision += 1
+        self._vertex_revision += 1
+        for neighbours in self._adj[vertices:]:
+            for edge_val in neighbours.values():
+                if edge_val > 0:
+                    self._edge_count -= 1
+        # The matrix is used to find which remaining vertices have edges to the deleted ones without looping over
+        # every vertex in Python
+        for vert_id in flatnonzero((self._adjacency_matrix.data[:vertices, vertices:] != 0).any(1)).tolist():
+            neighbours = self._adj[vert_id]
+            for next_vert in [next_vert for next_vert in neighbours.keys() if next_vert >= vertices]:
+                if neighbours.pop(next_vert) > 0:
+                    self._edge_count -= 1
+        del self._adj[vertices:]
+        self._adjacency_matrix.truncate(vertices)
+        # The list is edited in place as it can be shared with another graph
+        del self.vertex_positions[vertices:]
+
+    def delete_vertices(self, vert_ids):
+        # Deletes all the given vertices at once; every vertex after a deleted one moves down, so deleting several at
+        # once means the remaining vertices only need to be renumbered once (and the caller does not need to work out
+        # how each deletion shifts the ids of the rest)
+        self._revision += 1
+        self._vertex_revision += 1
+        to_delete = set(vert_ids)
+        for vert_id in sorted(to_delete, reverse=True):
+            self._adjacency_matrix.delete_row_column(vert_id)
+        kept_vert_ids = [vert_id for vert_id in range(self.vertices) if vert_id not in to_delete]
+        # Maps each old id to its new one, or -1 if it is deleted
+        new_vert_ids = [-1] * self.vertices
+        for new_vert_id, old_vert_id in enumerate(kept_vert_ids):
+            new_vert_ids[old_vert_id] = new_vert_id
+        self._positions[:len(kept_vert_ids)] = self._positions[kept_vert_ids]
+        # The list is edited in place as it can be shared with another graph
+        self.vertex_positions[:] = [self.vertex_positions[vert_id] for vert_id in kept_vert_ids]
+        self._adj = [{new_vert_ids[next_vert]: edge_val for next_vert, edge_val in self._adj[vert_id].items()
+                      if new_vert_ids[next_vert] != -1} for vert_id in kept_vert_ids]
+        self._edge_count = 0
+        for neighbours in self._adj:
+            for edge_val in neighbours.values():
+                if edge_val > 0:
+                    self._edge_count += 1
+
+    def get_edge_arrays(self, include_blocked=False):
+        # Returns two NumPy arrays of vertex ids, vert1_ids and vert2_ids, where each edge (vert1, vert2) with
+        # vert2 < vert1 and get_edge(vert1, vert2) being True appears once, ordered by vert1 and then vert2 (the same
+        # order as looping over vert1 and then every vert2 < vert1)
+        # If include_blocked is True, edges with negative values (which get_edge does not count) are included as well
+        # These are cached until the graph next changes as the intersection checks use them many times in a row
+        if self.__edge_arrays_revision != self._revision:
+            self.__edge_arrays = dict()
+            self.__edge_arrays_revision = self._revision
+        if include_blocked not in self.__edge_arrays:
+            vert1_ids = []
+            vert2_ids = []
+            for vert1_id, neighbours in enumerate(self._adj):
+                for vert2_id, edge_val in sorted(neighbours.items()):
+                    # Values of 0 are never stored, so every value left is either an edge or a blocked edge
+                    if vert2_id < vert1_id and (include_blocked or edge_val > 0):
+                        vert1_ids.append(vert1_id)
+                        vert2_ids.append(vert2_id)
+            self.__edge_arrays[include_blocked] = array(vert1_ids, dtype=int), array(vert2_ids, dtype=int)
+        return self.__edge_arrays[include_blocked]
+
+    def get_edge_segments(self, include_blocked=False):
+        # Returns the edges from get_edge_arrays(include_blocked) as line segments: NumPy arrays of the start position
+        # of each, the vector from its start to its end, the corners of its bounding box, and its gradient and y
+        # intercept (which are inf or nan for vertical edges)
+        # The intersection and closest edge checks need these for every edge, and are done many times in a row on a
+        # graph that has not changed, so they are cached in the same way as get_edge_arrays rather than worked out
+        # every check
+        if self.__edge_segments_revision != self._revision:
+            self.__edge_segments = dict()
+            self.__edge_segments_revision = self._revision
+        if include_blocked not in self.__edge_segments:
+            vert1_ids, vert2_ids = self.get_edge_arrays(include_blocked)
+            starts = self.positions[vert1_ids]
+            ends = self.positions[vert2_ids]
+            vecs = ends - starts
+            with errstate(divide="ignore", invalid="ignore"):
+                grads = vecs[:, 1] / vecs[:, 0]
+                intercepts = starts[:, 1] - starts[:, 0] * grads
+            self.__edge_segments[include_blocked] = EdgeSegments(vert1_ids, vert2_ids, starts, vecs,
+                                                                 minimum(starts, ends), maximum(starts, ends), grads,
+                                                                 intercepts)
+        return self.__edge_segments[include_blocked]
+
+    def _get_successors(self):
+        # Returns a list, for every vertex, of (next_vert, edge_val) tuples for each edge from it that can actually be
+        # travelled along (positive value), in the same order as in the adjacency dicts
+        # The searches are run many times in a row on a graph that does not change (e.g. joining links), so building
+        # these once means the blocked edges do not have to be skipped over again in every search
+        if self.__successors_revision != self._revision:
+            self.__successors = [[(next_vert, edge_val) for next_vert, edge_val in neighbours.items() if edge_val > 0]
+                                 for neighbours in self._adj]
+            self.__successors_revision = self._revision
+        return self.__successors
+
+    def _get_predecessors(self):
+        # Same as _get_successors but for the edges into every vertex rather than out of it, i.e. the successors of the
+        # graph with every edge reversed
+        if self.__predecessors_revision != self._revision:
+            self.__predecessors = [[] for _ in range(self.vertices)]
+            for prev_vert, neighbours in enumerate(self._adj):
+                for next_vert, edge_val in neighbours.items():
+                    if edge_val > 0:
+                        self.__predecessors[next_vert].append((prev_vert, edge_val))
+            self.__predecessors_revision = self._revision
+        return self.__predecessors
 
     def bfs(self, vert1_id, vert2_id):
         # Breadth-first search; finds the shortest path in an unweighted graph from vert1 to vert2
-        prev = [-1 for _ in range(self.vertices)]
-        distances = [-1 for _ in range(self.vertices)]
-        to_visit = DynamicQueue()
-        to_visit.enqueue(vert1_id)
-        while not to_visit.empty:
-            current_vert = to_visit.dequeue()
-            for next_vert in range(self.vertices):
-                if distances[next_vert] == -1 and self.get_edge(current_vert, next_vert):
-                    distances[next_vert] = distances[current_vert] + 1
-                    prev[next_vert] = current_vert
-                    if next_vert == vert2_id:
-                        # vert2 has been found
-                        return prev, distances
-                    to_visit.enqueue(next_vert)
+        # Rather than one vertex at a time, a whole level (every vertex the same distance from vert1) is expanded at
+        # once with NumPy using the rows of the adjacency matrix, so there is only one pass per level
+        adjacency_matrix = self._adjacency_matrix.data
+        prev = full(self.vertices, -1)
+        distances = full(self.vertices, -1)
+        distances[vert1_id] = 0
+        level = array([vert1_id])
+        while len(level) > 0:
+            # Negative weights count as non-existent edges
+            level_edges = (adjacency_matrix[level] > 0) & (distances == -1)
+            next_verts = flatnonzero(level_edges.any(0))
+            # Each new vertex's prev is the first vertex in the level with an edge to it, which is the vertex that
+            # would have found it first if the level was expanded one vertex at a time
+            prev_level_positions = level_edges[:, next_verts].argmax(0)
+            prev[next_verts] = level[prev_level_positions]
+            distances[next_verts] = distances[level[0]] + 1
+            if distances[vert2_id] != -1:
+                # vert2 has been found
+                return prev.tolist(), distances.tolist()
+            # Order the next level in the same order a queue would have
+            level = next_verts[lexsort((next_verts, prev_level_positions))]
         # No valid path
         return None
 
     def dfs(self, vert1_id):
         # Depth-first search; finds all accessible vertices from vert1
-        # Technically, a modified bfs would work perfectly well instead, but a DFS is generally more space efficient
-        # than a BFS, though in their respective worst-cases, they are identical
-        found_verts = [False for _ in range(self.vertices)]
+        # Technically, a modified bfs would work perfectly well instead, and that is what is done here; with NumPy, it
+        # is much faster to find all the new vertices reachable from the previous ones at once than to visit them one at
+        # a time with a stack
+        adjacency_matrix = self._adjacency_matrix.data
+        found_verts = zeros(self.vertices, dtype=bool)
         found_verts[vert1_id] = True
-        to_visit = DynamicStack()
-        to_visit.push(vert1_id)
-        while not to_visit.empty:
-            current_vert = to_visit.pop()
-            for next_vert in range(self.vertices):
-                if not found_verts[next_vert] and self.get_edge(current_vert, next_vert):
-                    to_visit.push(next_vert)
-                    found_verts[next_vert] = True
-        return found_verts
+        to_visit = array([vert1_id])
+        while len(to_visit) > 0:
+            to_visit = flatnonzero((adjacency_matrix[to_visit] > 0).any(0) & ~found_verts)
+            found_verts[to_visit] = True
+        return found_verts.tolist()
+
+    def dfs_reverse(self, vert2_id):
+        # Finds all vertices vert2 is accessible from, in the same way as dfs but using the columns of the adjacency
+        # matrix (edges into vertices) rather than the rows
+        adjacency_matrix = self._adjacency_matrix.data
+        found_verts = zeros(self.vertices, dtype=bool)
+        found_verts[vert2_id] = True
+        to_visit = array([vert2_id])
+        while len(to_visit) > 0:
+            to_visit = flatnonzero((adjacency_matrix[:, to_visit] > 0).any(1) & ~found_verts)
+            found_verts[to_visit] = True
+        return found_verts.tolist()
 
 
 class WeightedGraph(Graph):
@@ -99,13 +362,15 @@ class WeightedGraph(Graph):
     def get_edge_val(self, vert1_id, vert2_id):
         # Does not override get_edge as bool(any numeric!=0) is True and so rule with 0 representing no edge holds true
         # This means BFS and DFS methods are still valid for weighted graphs
-        return self._adjacency_matrix.get_item(vert1_id, vert2_id)
+        return self._adj[vert1_id].get(vert2_id, 0)
 
     def set_edge(self, vert1_id, vert2_id, new_edge_val, bi_directional=True, update_heuristic_scale=False):
-        self._adjacency_matrix.set_item(vert1_id, vert2_id, new_edge_val, mirrored=bi_directional)
+        self._adjacency_matrix.set_item(vert1_id, vert2_id, self._edge_sign(new_edge_val), mirrored=bi_directional)
+        self._update_adj(vert1_id, vert2_id, new_edge_val, bi_directional)
         if update_heuristic_scale:
-            new_heuristic_scale = new_edge_val/Vec2D.distance_between(self.vertex_positions[vert1_id],
-                                                                      self.vertex_positions[vert2_id])
+            vert1_pos = self.vertex_positions[vert1_id]
+            vert2_pos = self.vertex_positions[vert2_id]
+            new_heuristic_scale = new_edge_val/sqrt((vert1_pos.x - vert2_pos.x) ** 2 + (vert1_pos.y - vert2_pos.y) ** 2)
             if new_heuristic_scale < self.__heuristic_scale:
                 self.__heuristic_scale = new_heuristic_scale
 
@@ -115,67 +380,158 @@ class WeightedGraph(Graph):
         self.set_edge(len(self.vertex_positions) - 2, len(self.vertex_positions) - 1, new_edge_val)
 
     def heuristic(self, vert1_id, vert2_id):
-        return (Vec2D.distance_between(self.vertex_positions[vert1_id], self.vertex_positions[vert2_id])
-                * self.__heuristic_scale)
+        # Calculated from the coordinates directly rather than with Vec2D.distance_between to avoid creating a Vec2D
+        vert1_pos = self.vertex_positions[vert1_id]
+        vert2_pos = self.vertex_positions[vert2_id]
+        return sqrt((vert1_pos.x - vert2_pos.x) ** 2 + (vert1_pos.y - vert2_pos.y) ** 2) * self.__heuristic_scale
+
+    def _heuristics_to(self, vert2_id):
+        # Returns a list of the heuristic from every vertex to vert2
+        # The goal is fixed for a whole search, so these are all calculated at once in a list comprehension rather than
+        # calling heuristic every time a vertex is found
+        # This uses exactly the same arithmetic as heuristic (and the edge weights) rather than NumPy, as NumPy's hypot
+        # and squares can round very slightly differently, which could make the heuristic for a vertex next to the goal
+        # larger than the edge between them
+        goal_pos = self.vertex_positions[vert2_id]
+        goal_x = goal_pos.x
+        goal_y = goal_pos.y
+        heuristic_scale = self.__heuristic_scale
+        return [sqrt((vert_pos.x - goal_x) ** 2 + (vert_pos.y - goal_y) ** 2) * heuristic_scale
+                for vert_pos in self.vertex_positions]
 
-    def dijkstra(self, vert1_id, vert2_id):
+    def dijkstra(self, vert1_id, vert2_id=None):
         # Dijkstra graph search; finds the shortest path in a weighted graph from vert1 to vert2
+        # If vert2 is None, the search is not stopped early so the shortest paths from vert1 to every vertex are found
+        return self.__dijkstra(self._get_successors(), vert1_id, vert2_id)
+
+    def dijkstra_reverse(self, vert2_id):
+        # Finds the shortest paths from every vertex to vert2, by searching from vert2 along every edge backwards
+        # Returns next and distances, where next is the vertex after each vertex on its shortest path to vert2
+        # This means the distances both ways between one vertex and many others can be found with two searches rather
+        # than a search from each of the others
+        return self.__dijkstra(self._get_predecessors(), vert2_id, None)
+
+    def __dijkstra(self, successors, vert1_id, vert2_id):
         # Distance of -1 represents infinite as negative distances should be impossible
-        distances = [-1 for _ in range(self.vertices)]
+        # Attributes and methods used in the loop are bound to local variables as the searches are the hottest code in
+        # the program and local lookups are much faster in Python
+        distances = [-1] * self.vertices
         distances[vert1_id] = 0
-        prev = [0 for _ in range(self.vertices)]
-        to_visit = DynamicPriorityQueue()
+        prev = [0] * self.vertices
+        # The priority queue is a heap of (priority, vertex) tuples using heapq, which is written in C so is far faster
+        # than my own priority queue. Instead of decreasing the priority of a vertex already in the heap, it is just
+        # pushed again and the old (stale) entry is skipped when it is popped
+        to_visit = []
         # As queue is ordered with by minimum priority, distances can be used directly as priorities
-        to_visit.enqueue(vert1_id, 0)
-        while not to_visit.empty:
-            current_vert = to_visit.dequeue()
-            if distances[vert2_id] != -1 and distances[vert2_id] < distances[current_vert]:
+        heappush(to_visit, (0, vert1_id))
+        while to_visit:
+            priority, current_vert = heappop(to_visit)
+            current_dist = distances[current_vert]
+            if priority > current_dist:
+                # A shorter route to this vertex was found after this entry was pushed, so it has already been visited
+                continue
+            if current_vert == vert2_id:
                 # As to_visit is ordered by distance and negative distances are impossible, there cannot be a shorter
-                # path to vert2
+                # path to vert2 than the one it was popped with
                 return prev, distances
-            for next_vert in range(self.vertices):
-                if self.get_edge(current_vert, next_vert):
-                    dist = distances[current_vert] + self.get_edge_val(current_vert, next_vert)
-                    if distances[next_vert] == -1 or dist < distances[next_vert]:
-                        # Either no route to that vertex has been found previously or a shorter route than the previous
-                        # one has been found
-                        prev[next_vert] = current_vert
-                        distances[next_vert] = dist
-                        to_visit.decrease_priority_or_enqueue(next_vert, dist)
-        if distances[vert2_id] != -1:
+            for next_vert, edge_val in successors[current_vert]:
+                dist = current_dist + edge_val
+                if distances[next_vert] == -1 or dist < distances[next_vert]:
+                    # Either no route to that vertex has been found previously or a shorter route than the previous one
+                    # has been found
+                    prev[next_vert] = current_vert
+                    distances[next_vert] = dist
+                    heappush(to_visit, (dist, next_vert))
+        if vert2_id is None or distances[vert2_id] != -1:
             return prev, distances
         else:
             # No valid path
             return None
 
-    def a_star(self, vert1_id, vert2_id):
+    def a_star(self, vert1_id, vert2_id, ignored_edge=None, binary_heap_order=False):
         # A* graph search; finds the shortest path in a weighted graph from vert1 to vert2 as long as the heuristic
         # is admissible
         # Very similar to Dijkstra but uses a heuristic for some speed-up
+        # If ignored_edge is a (vert_a, vert_b) pair, the edges between them in both directions are not used, as if
+        # they had been removed from the graph
+        # If binary_heap_order is True, vertices with equal priorities are visited in the same order as my
+        # DynamicBinaryHeap (see __a_star_binary_heap), rather than in the order heapq gives
         # Distance of -1 represents infinite as negative distances should be impossible
-        distances = [-1 for _ in range(self.vertices)]
+        successors = self._get_successors()
+        if ignored_edge is not None:
+            # Only the successors of the two vertices change, so just their lists are swapped out for the search and
+            # put back straight after, rather than the edge being removed from the graph (which would mean rebuilding
+            # all of them) or the whole list of successors being copied
+            vert_a, vert_b = ignored_edge
+            old_successors = successors[vert_a], successors[vert_b]
+            successors[vert_a] = [successor for successor in successors[vert_a] if successor[0] != vert_b]
+            successors[vert_b] = [successor for successor in successors[vert_b] if successor[0] != vert_a]
+            try:
+                return self.a_star(vert1_id, vert2_id, binary_heap_order=binary_heap_order)
+            finally:
+                successors[vert_a], successors[vert_b] = old_successors
+        heuristics = self._heuristics_to(vert2_id)
+        if binary_heap_order:
+            return self.__a_star_binary_heap(successors, heuristics, vert1_id, vert2_id)
+        distances = [-1] * self.vertices
         distances[vert1_id] = 0
-        prev = [0 for _ in range(self.vertices)]
-        to_visit = DynamicPriorityQueue()
+        prev = [0] * self.vertices
+        # Heap with lazy deletion, like in dijkstra
+        to_visit = []
         # As queue is ordered with by minimum priority, distances can be used directly as priorities
-        to_visit.enqueue(vert1_id, 0)
-        while not to_visit.empty:
-            current_vert = to_visit.dequeue()
-            if distances[vert2_id] != -1 and distances[vert2_id] < distances[current_vert] + self.heuristic(
-                    current_vert, vert2_id):
+        heappush(to_visit, (0, vert1_id))
+        while to_visit:
+            priority, current_vert = heappop(to_visit)
+            current_dist = distances[current_vert]
+            if priority > current_dist + heuristics[current_vert]:
+                # Stale entry
+                continue
+            if current_vert == vert2_id:
+                # As to_visit is ordered by distance and negative distances are impossible, there cannot be a shorter
+                # path to vert2 than the one it was popped with as long as the heuristic is admissible
+                return prev, distances
+            for next_vert, edge_val in successors[current_vert]:
+                dist = current_dist + edge_val
+                if distances[next_vert] == -1 or dist < distances[next_vert]:
+                    # Either no route to that vertex has been found previously or a shorter route than the previous one
+                    # has been found
+                    prev[next_vert] = current_vert
+                    distances[next_vert] = dist
+                    heappush(to_visit, (dist + heuristics[next_vert], next_vert))
+                # Or if a faster route has been found to that vertex already, nothing needs to be done
+        if distances[vert2_id] != -1:
+            return prev, distances
+        else:
+            # No valid path
+            return None
+
+    def __a_star_binary_heap(self, successors, heuristics, vert1_id, vert2_id):
+        # The same search as a_star, but with my DynamicBinaryHeap as the priority queue (decreasing the priority of a
+        # vertex already in the heap rather than pushing it again), like every search used before heapq
+        # When two paths are the same length, which one is found depends on the order vertices with equal priorities
+        # come out of the queue, and heapq orders them differently. The nav mesh regions are found with this search, and
+        # the ids of the nav graph vertices depend on the order of the regions, so with heapq they could be numbered
+        # differently to before. Nav graph edits are saved with the vertex ids, so this would make edits saved before
+        # load onto the wrong edges
+        distances = [-1] * self.vertices
+        distances[vert1_id] = 0
+        prev = [0] * self.vertices
+        to_visit = DynamicBinaryHeap()
+        decrease_priority_or_insert = to_visit.decrease_priority_or_insert
+        to_visit.insert_item(vert1_id, 0)
+        while to_visit.length:
+            current_vert = to_visit.extract_root().item
+            current_dist = distances[current_vert]
+            if distances[vert2_id] != -1 and distances[vert2_id] < current_dist + heuristics[current_vert]:
                 # As to_visit is ordered by distance and negative distances are impossible, there cannot be a shorter
                 # path to vert2 as long as the heuristic is admissible
                 return prev, distances
-            for next_vert in range(self.vertices):
-                if self.get_edge(current_vert, next_vert):
-                    dist = distances[current_vert] + self.get_edge_val(current_vert, next_vert)
-                    if distances[next_vert] == -1 or dist < distances[next_vert]:
-                        # Either no route to that vertex has been found previously or a shorter route than the previous
-                        # one has been found
-                        prev[next_vert] = current_vert
-                        distances[next_vert] = dist
-                        to_visit.decrease_priority_or_enqueue(next_vert, dist + self.heuristic(next_vert, vert2_id))
-                    # Or if a faster route has been found to that vertex already, nothing needs to be done
+            for next_vert, edge_val in successors[current_vert]:
+                dist = current_dist + edge_val
+                if distances[next_vert] == -1 or dist < distances[next_vert]:
+                    prev[next_vert] = current_vert
+                    distances[next_vert] = dist
+                    decrease_priority_or_insert(next_vert, dist + heuristics[next_vert])
         if distances[vert2_id] != -1:
             return prev, distances
         else:
@@ -186,22 +542,25 @@ class WeightedGraph(Graph):
         # Greedy best-first graph search; finds a path in a weighted graph from vert1 to vert2
         # Can be more efficient than A* or Dijkstra in many cases as it always explores vertices closer to the goal,
         # instead of having to check for other alternate paths
-        distances = [-1 for _ in range(self.vertices)]
+        successors = self._get_successors()
+        heuristics = self._heuristics_to(vert2_id)
+        distances = [-1] * self.vertices
         distances[vert1_id] = 0
-        prev = [0 for _ in range(self.vertices)]
-        to_visit = DynamicPriorityQueue()
-        to_visit.enqueue(vert1_id, self.heuristic(vert1_id, vert2_id))
-        while not to_visit.empty:
-            current_vert = to_visit.dequeue()
-            for next_vert in range(self.vertices):
-                if self.get_edge(current_vert, next_vert) and distances[next_vert] == -1:
+        prev = [0] * self.vertices
+        # Each vertex is only ever pushed once (when it is first found), so unlike dijkstra and a_star there are no
+        # stale entries to skip
+        to_visit = []
+        heappush(to_visit, (heuristics[vert1_id], vert1_id))
+        while to_visit:
+            current_vert = heappop(to_visit)[1]
+            current_dist = distances[current_vert]
+            for next_vert, edge_val in successors[current_vert]:
+                if distances[next_vert] == -1:
                     # New vertex has been found
                     prev[next_vert] = current_vert
-                    distances[next_vert] = distances[current_vert] + self.get_edge_val(current_vert, next_vert)
-                    to_visit.enqueue(next_vert, self.heuristic(next_vert, vert2_id))
+                    distances[next_vert] = current_dist + edge_val
+                    heappush(to_visit, (heuristics[next_vert], next_vert))
                     if next_vert == vert2_id:
                         return prev, distances
-
-            print(current_vert)
         # No valid path
         return None
@@ -1,11 +1,12 @@
-from collections import namedtuple
-from copy import deepcopy
-
 from Graph import WeightedGraph
 from Floor import Floor
 from NavigationMesh import NavMesh
 from Vector2D import Vec2D
 from Constants import GlobalConstants
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from os import cpu_count
 
 
 class Map:
@@ -13,8 +14,31 @@ class Map:
     START = 1
     END = 0
 
-    LinkTuple = namedtuple("LinkTuple", "vert_id link_num")
-    LinkTuple2 = namedtuple("LinkTuple2", "link_num floor_num link_id")
+    # Names of the graph search methods for each algorithm option, so the method to use can be looked up once rather
+    # than going through an if/elif chain of every option each time a search is done
+    PRIMARY_ALGORITHMS = {GlobalConstants.A_STAR: "a_star", GlobalConstants.DIJKSTRA: "dijkstra",
+                          GlobalConstants.GREEDY: "greedy"}
+    LINK_ALGORITHMS = {GlobalConstants.BFS: "bfs", GlobalConstants.DIJKSTRA: "dijkstra",
+                       GlobalConstants.A_STAR: "a_star", GlobalConstants.GREEDY: "greedy"}
+
+    class FloorNode:
+        # A link on a floor and its vertex id on the link graph
+        # __slots__ stops every instance from needing its own dictionary of attributes, which makes them smaller and
+        # their attributes faster to access than a namedtuple's
+        __slots__ = ("vert_id", "link_num")
+
+        def __init__(self, vert_id, link_num):
+            self.vert_id = vert_id
+            self.link_num = link_num
+
+    class LinkGraphNode:
+        # The link a vertex on the link graph is for
+        __slots__ = ("link_num", "floor_num", "link_id")
+
+        def __init__(self, link_num, floor_num, link_id):
+            self.link_num = link_num
+            self.floor_num = floor_num
+            self.link_id = link_id
 
     def __init__(self, data=None):
         # These dictionaries are used to keep track of which links are on which floors and share which IDs
@@ -30,124 +54,201 @@ class Map:
             self.floors[0] = Floor()
         else:
             floor_num = None
-            for line_num in range(1, len(data)):
-                line = data[line_num].split(" ")
-                if len(line) == 0:
-                    raise Exception("Invalid file")
-                if line[0] == "F":
-                    if len(line) > 1 and Map.__is_int(line[1]):
-                        floor_num = int(line[1])
-                        self.floors[floor_num] = Floor(Empty=True)
-                    else:
+            floor = None
+            walls = None
+            # Bound to local variables as they are used for every line
+            to_int = Map.__to_int
+            to_float = Map.__to_float
+            # data can be any iterable of lines (such as the open file itself), so the file never has to be read into
+            # memory all at once
+            lines = iter(data)
+            # Skip the header line
+            next(lines, None)
+            for line in lines:
+                # Only the tag at the start of the line is split off, the rest is handled differently by each tag
+                tag, _, values = line.rstrip("\n").partition(" ")
+                if tag == "F":
+                    floor_num = to_int(values.split(" ")[0])
+                    if floor_num is None:
                         raise Exception("Invalid file")
-                elif line[0] == "L":
-                    if floor_num is not None and len(line) > 3 and Map.__is_float(line[-2]) and Map.__is_float(
-                            line[-1]):
-                        self.floors[floor_num].add_link(" ".join(line[1:len(line)-2]), Vec2D(float(line[-2]), float(
-                            line[-1])))
-                    else:
+                    # The floor and its walls are kept in local variables for the lines after it, rather than being
+                    # looked up again for every line
+                    floor = Floor(Empty=True)
+                    walls = floor.walls
+                    self.floors[floor_num] = floor
+                elif tag == "L":
+                    # Link ids can contain spaces, so the position is found from the last two spaces instead
+                    y_space = values.rfind(" ")
+                    x_space = values.rfind(" ", 0, y_space)
+                    if floor_num is None or x_space == -1:
                         raise Exception("Invalid file")
-                elif line[0] == "V":
-                    if floor_num is not None and len(line) > 2 and Map.__is_float(line[1]) and Map.__is_float(line[2]):
-                        self.floors[floor_num].walls.add_vertex(Vec2D(float(line[1]), float(line[2])))
-                    else:
+                    x = to_float(values[x_space + 1:y_space])
+                    y = to_float(values[y_space + 1:])
+                    if x is None or y is None:
+                        raise Exception("Invalid file")
+                    floor.add_link(values[:x_space], Vec2D(x, y))
+                elif tag == "V":
+                    values = values.split(" ")
+                    if floor_num is None or len(values) < 2:
+                        raise Exception("Invalid file")
+                    x = to_float(values[0])
+                    y = to_float(values[1])
+                    if x is None or y is None:
                         raise Exception("Invalid file")
-                elif line[0] == "W":
-                    if (floor_num is not None and len(line) > 3 and Map.__is_float(line[1]) and
-                            Map.__is_int(line[2]) and Map.__is_float(line[3]) and int(line[2]) <
-                            self.floors[floor_num].walls.vertices and int(line[3]) <
-                            self.floors[floor_num].walls.vertices):
-                        self.floors[floor_num].walls.set_edge(int(line[2]), int(line[3]), float(line[1]))
+                    walls.add_vertex(Vec2D(x, y))
+                elif tag == "W":
+                    values = values.split(" ")
+                    # Invalid walls are just skipped
+                    if floor_num is None or len(values) < 3:
+                        continue
+                    edge_val = to_float(values[0])
+                    vert1_id = to_int(values[1])
+                    vert2_id = to_int(values[2])
+                    if edge_val is None or vert1_id is None or vert2_id is None:
+                        continue
+                    wall_vertices = walls.vertices
+                    if vert1_id < wall_vertices and vert2_id < wall_vertices:
+                        walls.set_edge(vert1_id, vert2_id, edge_val)
                 else:
                     raise Exception("Invalid file")
 
     def load_nav_graph_edits(self, data):
         floor_num = None
-        for line_num in range(1, len(data)):
-            line = data[line_num].split(" ")
-            if len(line) == 0:
-                raise Exception("Invalid file")
-            else:
-                if line[0] == "M":
-                    if len(line) > 1 and Map.__is_int(line[1]):
-                        floor_num = int(line[1])
-                    else:
-                        raise Exception("Invalid file")
-                elif line[0] == "E":
-                    if (floor_num is not None and len(line) > 3 and Map.__is_float(line[1]) and
-                            Map.__is_int(line[2]) and Map.__is_float(line[3]) and int(line[2]) <
-                            self.nav_meshes[floor_num].nav_graph.vertices and int(line[3]) <
+        # Bound to local variables as they are used for every line
+        to_int = Map.__to_int
+        to_float = Map.__to_float
+        # Same as when loading a map, data can be any iterable of lines
+        lines = iter(data)
+        next(lines, None)
+        for line in lines:
+            tag, _, values = line.rstrip("\n").partition(" ")
+            values = values.split(" ")
+            if tag == "M":
+                floor_num = to_int(values[0])
+                if floor_num is None:
+                    raise Exception("Invalid file")
+            elif tag == "E":
+                # Invalid edges are just skipped
+                if floor_num is not None and len(values) > 2:
+                    edge_val = to_float(values[0])
+                    vert1_id = to_int(values[1])
+                    vert2_id = to_int(values[2])
+                    if (edge_val is not None and vert1_id is not None and vert2_id is not None and vert1_id <
+                            self.nav_meshes[floor_num].nav_graph.vertices and vert2_id <
                             self.nav_meshes[floor_num].nav_graph.vertices):
-                        self.nav_meshes[floor_num].nav_graph.set_edge(int(line[2]), int(line[3]), float(line[1]),
+                        self.nav_meshes[floor_num].nav_graph.set_edge(vert1_id, vert2_id, edge_val,
                                                                       bi_directional=False,
                                                                       update_heuristic_scale=True)
 
     @staticmethod
-    def __is_int(number):
+    def __to_int(number):
+        # Converts number to an int, returning None if it is not a valid int, so each number only has to be converted
+        # once rather than checked and then converted
         try:
-            int(number)
-            return True
+            return int(number)
         except ValueError:
-            return False
+            return None
 
     @staticmethod
-    def __is_float(number):
+    def __to_float(number):
+        # Same as above but for floats
         try:
-            float(number)
-            return True
+            return float(number)
         except ValueError:
-            return False
+            return None
 
     def get_save_data(self, store_nav_graphs=False):
-        save_data = "MAP FILE"
+        # Lines are collected in lists and joined at the end, as adding to a string copies the whole string every time
+        save_data = ["MAP FILE"]
         for floor_key in self.floors.keys():
-            save_data += "\nF "+str(floor_key)
+            save_data.append("F "+str(floor_key))
             for link in self.floors[floor_key].links:
-                save_data += "\nL "+str(link.link_id)+" "+str(link.position.x)+" "+str(link.position.y)
+                save_data.append("L "+str(link.link_id)+" "+str(link.position.x)+" "+str(link.position.y))
             for vertex_pos in self.floors[floor_key].walls.vertex_positions:
-                save_data += "\nV "+str(vertex_pos.x)+" "+str(vertex_pos.y)
-            for vert1_id in range(self.floors[floor_key].walls.vertices):
-                for vert2_id in range(vert1_id):
-                    if self.floors[floor_key].walls.get_edge(vert1_id, vert2_id):
-                        save_data += "\nW "+str(self.floors[floor_key].walls.get_edge_val(
-                            vert1_id, vert2_id))+" "+str(vert1_id)+" "+str(vert2_id)
+                save_data.append("V "+str(vertex_pos.x)+" "+str(vertex_pos.y))
+            for vert1_id, vert2_id, edge_val in self.floors[floor_key].walls.iter_edges():
+                # Each wall is only saved once, and walls with negative values do not count
+                if vert2_id < vert1_id and edge_val > 0:
+                    save_data.append("W "+str(edge_val)+" "+str(vert1_id)+" "+str(vert2_id))
         if not store_nav_graphs:
-            return save_data, None
+            return "\n".join(save_data), None
         else:
-            save_data2 = "NAV GRAPH FILE"
+            save_data2 = ["NAV GRAPH FILE"]
             for floor_key in self.nav_meshes.keys():
-                save_data2 += "\nM " + str(floor_key)
-                for vert1_id in range(self.nav_meshes[floor_key].nav_graph.vertices):
-                    for vert2_id in range(self.nav_meshes[floor_key].nav_graph.vertices):
-                        # Edge weights of -1 must be saved as well
-                        # No point of storing weights that are just the default heuristic
-                        if (self.nav_meshes[floor_key].nav_graph.get_edge_val(vert1_id, vert2_id) != 0 and
-                                self.nav_meshes[floor_key].nav_graph.get_edge_val(vert1_id, vert2_id) !=
-                                self.nav_meshes[floor_key].nav_graph.heuristic(vert1_id, vert2_id)):
-                            save_data2 += "\nE "+str(self.nav_meshes[floor_key].nav_graph.get_edge_val(
-                                vert1_id, vert2_id))+" "+str(vert1_id)+" "+str(vert2_id)
-            return save_data, save_data2
+                save_data2.append("M " + str(floor_key))
+                heuristic = self.nav_meshes[floor_key].nav_graph.heuristic
+                # Edge weights of -1 must be saved as well
+                for vert1_id, vert2_id, edge_val in self.nav_meshes[floor_key].nav_graph.iter_edges():
+                    # No point of storing weights that are just the default heuristic
+                    if edge_val != heuristic(vert1_id, vert2_id):
+                        save_data2.append("E "+str(edge_val)+" "+str(vert1_id)+" "+str(vert2_id))
+            return "\n".join(save_data), "\n".join(save_data2)
 
     def generate_nav_graphs(self, master, verts_per_edge):
         # Generates the nav_graphs and every so often updates loading bar of main UI to show progress is being made
-        # Floor nums are not necessarily in order and can be negative, so a second variable is used to keep track of
-        # progress
-        floors_done = 0
+        # Floor nums are not necessarily in order and can be negative, so the number of nav meshes made so far is used
+        # to keep track of progress
+        nav_meshes = dict()
+        # Each floor's nav mesh does not depend on any other floor, so they are generated at the same time in separate
+        # processes (threads would not help as Python can only run one at a time). Starting the processes and sending
+        # the floors to them is not worth it for just one floor
+        if len(self.floors) > 1:
+            try:
+                if not self.__generate_nav_meshes_in_processes(verts_per_edge, master, nav_meshes):
+                    # Calls prev_stage and returns if cancelled
+                    master.prev_stage()
+                    return
+            except (OSError, NotImplementedError, BrokenProcessPool):
+                # Multiprocessing is not available on every system, and the processes can fail to start or be killed,
+                # in which case any floors that have not been done yet are just done one by one below
+                pass
         for floor_num in self.floors.keys():
-            self.nav_meshes[floor_num] = NavMesh(self.floors[floor_num].walls, self.floors[floor_num].links,
-                                                 verts_per_edge)
-            floors_done += 1
-            if not master.nav_mesh_generation_update_prog(floor_num/len(self.floors.keys())):
-                # Calls prev_stage and returns if cancelled
-                master.prev_stage()
-                return
+            if floor_num not in nav_meshes:
+                nav_meshes[floor_num] = NavMesh(self.floors[floor_num].walls, self.floors[floor_num].links,
+                                                verts_per_edge)
+                if not master.nav_mesh_generation_update_prog(len(nav_meshes)/len(self.floors)):
+                    # Calls prev_stage and returns if cancelled
+                    master.prev_stage()
+                    return
+        # The floors can finish in any order, so they are added in the order of the floors at the end to keep the nav
+        # meshes in the same order (which is the order they are saved in)
+        for floor_num in self.floors.keys():
+            self.nav_meshes[floor_num] = nav_meshes[floor_num]
         # Final check for if map splitting process has been cancelled
         if not master.nav_mesh_generation_update_prog(1):
             master.prev_stage()
             return
         master.next_stage()
 
-    def join_links(self, precompute_link_dist, primary_algorithm, link_weight):
+    def __generate_nav_meshes_in_processes(self, verts_per_edge, master, nav_meshes):
+        # Generates the nav mesh of every floor in a pool of processes (no more than there are floors, or than the
+        # computer can run at once), adding each to nav_meshes as it finishes. Returns False if cancelled
+        executor = ProcessPoolExecutor(max_workers=min(len(self.floors), cpu_count() or 1))
+        cancelled = False
+        try:
+            futures = {executor.submit(NavMesh, self.floors[floor_num].walls, self.floors[floor_num].links,
+                                       verts_per_edge): floor_num for floor_num in self.floors.keys()}
+            # The progress bar is updated from here as the UI can only be used by the main process
+            for future in as_completed(futures):
+                nav_meshes[futures[future]] = future.result()
+                if not master.nav_mesh_generation_update_prog(len(nav_meshes)/len(self.floors)):
+                    cancelled = True
+                    return False
+        finally:
+            # The processes are always shut down, even if generating a floor raised an exception, and floors that
+            # have not been started yet are cancelled. If the user cancelled, the floors still being generated are left
+            # to finish on their own so the UI does not have to wait for them
+            executor.shutdown(wait=not cancelled, cancel_futures=True)
+        return True
+
+    def join_links(self, precompute_link_dist, primary_algorithm, link_weight, link_algorithm=None):
+        # BFS ignores edge weights, so when it is the link algorithm there is no point finding the distances between
+        # links; whether they are accessible from each other is all that matters
+        # This means precompute_link_dist is ignored with BFS (the Pathfinding help text says so), and links are joined
+        # as if it were off. Links sharing an id on the same floor can then get the heuristic weight rather than
+        # link_weight, so pathfind walks between them instead of treating it as just moving between links
+        if link_algorithm == GlobalConstants.BFS:
+            precompute_link_dist = False
         self.__id_indexed_nodes = dict()
         self.__floor_indexed_nodes = dict()
         self.__link_graph_id_indexed_nodes = dict()
@@ -156,78 +257,101 @@ class Map:
             for link_num in range(len(self.floors[floor_num].links)):
                 self.__add_link(floor_num, link_num, precompute_link_dist, primary_algorithm, link_weight)
 
-    def __add_link(self, floor_num, link_num, precompute_link_dist, primary_algorithm, link_weight):
+    def __add_link(self, floor_num, link_num, precompute_link_dist, primary_algorithm, link_weight, outgoing=True,
+                   incoming=True):
         # Each link must be joined in the link graph to all other links sharing the id (case 1) and sharing floors
         # (case 2)
+        # outgoing and incoming are whether edges from and to the new link are needed for case 2; the start and end
+        # of a path only need one of them, so half the searches can be skipped for them
         link = self.floors[floor_num].links[link_num]
         # Position on link graph is arbitrary - this is the only graph in program where positions don't make much sense
         # By using a y value of the floor number, the heuristic will aim to take floors towards the intended
         # floor, which seems logical for most real-life buildings, though I have not decided, as I write this
         # comment, whether I will allow the selection of heuristic-dependant algorithms for finding paths
         # through the link graph
-        self.link_graph.add_vertex(Vec2D(0, floor_num))
-        if link.link_id in self.__id_indexed_nodes.keys():
+        link_graph = self.link_graph
+        link_graph.add_vertex(Vec2D(0, floor_num))
+        new_vert_id = link_graph.vertices - 1
+        if link.link_id in self.__id_indexed_nodes:
             # Case 1
             for prev_link_id in self.__id_indexed_nodes[link.link_id]:
                 # Links with the same id are connected
-                self.link_graph.set_edge(self.link_graph.vertices - 1, prev_link_id, link_weight)
+                link_graph.set_edge(new_vert_id, prev_link_id, link_weight)
         else:
-            self.__id_indexed_nodes[link.link_id] = []
-        if floor_num in self.__floor_indexed_nodes.keys():
+            # Only vertex ids are stored, so a typed array keeps them as plain C ints rather than a list of Python ints
+            self.__id_indexed_nodes[link.link_id] = array("i")
+        if floor_num in self.__floor_indexed_nodes:
             # Case 2
-            for prev_link in self.__floor_indexed_nodes[floor_num]:
+            # Looked up once here rather than every time they are used in the loop
+            nav_mesh = self.nav_meshes[floor_num]
+            nav_graph = nav_mesh.nav_graph
+            link_id = nav_mesh.get_nav_graph_link_id(link_num)
+            floor_nodes = self.__floor_indexed_nodes[floor_num]
+            if precompute_link_dist and primary_algorithm not in self.PRIMARY_ALGORITHMS:
+                raise Exception("Invalid primary algorithm.")
+            # A* and Dijkstra both find the shortest path, so rather than searching between every pair of links, the
+            # distances from the new link to every other vertex and from every other vertex to the new link are found
+            # with one Dijkstra search each (the second along the edges backwards). Greedy paths depend on the goal,
+            # so must be searched for between every pair of links
+            greedy = primary_algorithm == GlobalConstants.GREEDY
+            if precompute_link_dist and not greedy and floor_nodes:
+                if outgoing:
+                    distances_from = nav_graph.dijkstra(link_id)[1]
+                if incoming:
+                    distances_to = nav_graph.dijkstra_reverse(link_id)[1]
+            elif not precompute_link_dist and floor_nodes:
+                # Which vertices are accessible from and can access the new link do not depend on the earlier link
+                if outgoing:
+                    accessible_from = nav_graph.dfs(link_id)
+                if incoming:
+                    accessible_to = nav_graph.dfs_reverse(link_id)
+            for prev_link in floor_nodes:
                 # Links on the same floor so attempt to pathfind
-                link_id = self.nav_meshes[floor_num].get_nav_graph_link_id(link_num)
-                prev_link_id = self.nav_meshes[floor_num].get_nav_graph_link_id(prev_link.link_num)
+                prev_link_id = nav_mesh.get_nav_graph_link_id(prev_link.link_num)
                 if precompute_link_dist:
                     # If distances are to be cached, then the path between the links must be found
-                    if primary_algorithm == GlobalConstants.A_STAR:
-                        returned = self.nav_meshes[floor_num].nav_graph.a_star(link_id, prev_link_id)
-                        returned2 = self.nav_meshes[floor_num].nav_graph.a_star(prev_link_id, link_id)
-                    elif primary_algorithm == GlobalConstants.DIJKSTRA:
-                        returned = self.nav_meshes[floor_num].nav_graph.dijkstra(link_id, prev_link_id)
-                        returned2 = self.nav_meshes[floor_num].nav_graph.dijkstra(prev_link_id, link_id)
-                    elif primary_algorithm == GlobalConstants.GREEDY:
-                        returned = self.nav_meshes[floor_num].nav_graph.greedy(link_id, prev_link_id)
-                        returned2 = self.nav_meshes[floor_num].nav_graph.greedy(prev_link_id, link_id)
+                    new_weight = -1
+                    new_weight2 = -1
+                    if greedy:
+                        if outgoing:
+                            returned = nav_graph.greedy(link_id, prev_link_id)
+                            if returned is not None:
+                                new_weight = returned[1][prev_link_id]
+                        if incoming:
+                            returned = nav_graph.greedy(prev_link_id, link_id)
+                            if returned is not None:
+                                new_weight2 = returned[1][link_id]
                     else:
-                        raise Exception("Invalid primary algorithm.")
-                    if returned is not None:
-                        _, distances = returned
-                        new_weight = distances[prev_link_id]
-                        if (not self.link_graph.get_edge(self.link_graph.vertices - 1, prev_link.vert_id) or
-                                new_weight < self.link_graph.get_edge_val(self.link_graph.vertices - 1,
-                                                                          prev_link.vert_id)):
-                            self.link_graph.set_edge(self.link_graph.vertices - 1, prev_link.vert_id, new_weight,
-                                                     bi_directional=False)
-                    if returned2 is not None:
-                        _, distances = returned2
-                        new_weight = distances[link_id]
-                        if (not self.link_graph.get_edge(prev_link.vert_id, self.link_graph.vertices - 1) or new_weight
-                                < self.link_graph.get_edge_val(prev_link.vert_id, self.link_graph.vertices - 1)):
-                            self.link_graph.set_edge(prev_link.vert_id, self.link_graph.vertices - 1, new_weight,
-                                                     bi_directional=False)
+                        if outgoing:
+                            new_weight = distances_from[prev_link_id]
+                        if incoming:
+                            new_weight2 = distances_to[prev_link_id]
+                    # Distance of -1 means there is no path
+                    if new_weight != -1:
+                        if (not link_graph.get_edge(new_vert_id, prev_link.vert_id) or
+                                new_weight < link_graph.get_edge_val(new_vert_id, prev_link.vert_id)):
+                            link_graph.set_edge(new_vert_id, prev_link.vert_id, new_weight, bi_directional=False)
+                    if new_weight2 != -1:
+                        if (not link_graph.get_edge(prev_link.vert_id, new_vert_id) or
+                                new_weight2 < link_graph.get_edge_val(prev_link.vert_id, new_vert_id)):
+                            link_graph.set_edge(prev_link.vert_id, new_vert_id, new_weight2, bi_directional=False)
                 else:
                     # Otherwise, heuristic is used as long as it is accessible and the heuristic weight is lower
                     # than the previous weight
-                    if self.nav_meshes[floor_num].nav_graph.dfs(link_id)[prev_link_id]:
-                        new_weight = self.nav_meshes[floor_num].nav_graph.heuristic(link_id, prev_link_id)
-                        if (not self.link_graph.get_edge(self.link_graph.vertices - 1, prev_link.vert_id) or new_weight
-                                < self.link_graph.get_edge_val(self.link_graph.vertices - 1, prev_link.vert_id)):
-                            self.link_graph.set_edge(self.link_graph.vertices - 1, prev_link.vert_id, new_weight,
-                                                     bi_directional=False)
-                    if self.nav_meshes[floor_num].nav_graph.dfs(prev_link_id)[link_id]:
-                        new_weight = self.nav_meshes[floor_num].nav_graph.heuristic(link_id, prev_link_id)
-                        if (not self.link_graph.get_edge(prev_link.vert_id, self.link_graph.vertices - 1) or new_weight
-                                < self.link_graph.get_edge_val(prev_link.vert_id, self.link_graph.vertices - 1)):
-                            self.link_graph.set_edge(prev_link.vert_id, self.link_graph.vertices - 1, new_weight,
-                                                     bi_directional=False)
+                    new_weight = nav_graph.heuristic(link_id, prev_link_id)
+                    if outgoing and accessible_from[prev_link_id]:
+                        if (not link_graph.get_edge(new_vert_id, prev_link.vert_id) or
+                                new_weight < link_graph.get_edge_val(new_vert_id, prev_link.vert_id)):
+                            link_graph.set_edge(new_vert_id, prev_link.vert_id, new_weight, bi_directional=False)
+                    if incoming and accessible_to[prev_link_id]:
+                        if (not link_graph.get_edge(prev_link.vert_id, new_vert_id) or
+                                new_weight < link_graph.get_edge_val(prev_link.vert_id, new_vert_id)):
+                            link_graph.set_edge(prev_link.vert_id, new_vert_id, new_weight, bi_directional=False)
         else:
             self.__floor_indexed_nodes[floor_num] = []
-        self.__id_indexed_nodes[link.link_id].append(self.link_graph.vertices - 1)
-        self.__floor_indexed_nodes[floor_num].append(self.LinkTuple(self.link_graph.vertices - 1, link_num))
-        self.__link_graph_id_indexed_nodes[self.link_graph.vertices - 1] = self.LinkTuple2(link_num, floor_num,
-                                                                                           link.link_id)
+        self.__id_indexed_nodes[link.link_id].append(new_vert_id)
+        self.__floor_indexed_nodes[floor_num].append(self.FloorNode(new_vert_id, link_num))
+        self.__link_graph_id_indexed_nodes[new_vert_id] = self.LinkGraphNode(link_num, floor_num, link.link_id)
 
     def pathfind(self, start_pos, start_floor_num, end_pos, end_floor_num, primary_algorithm, link_algorithm,
                  precompute_link_dist, link_weight):
@@ -239,73 +363,62 @@ class Map:
         start_link_num = len(self.floors[start_floor_num].links)-1
         self.floors[end_floor_num].add_link(self.END, end_pos)
         end_link_num = len(self.floors[end_floor_num].links) - 1
-        # Reverting the nav meshes to their previous state is more trouble than it's worth tbh, so they are copied
-        # Probably later I should add actual code for reverting them properly to cut down on memory usage, but for now
-        # this works fine
-        old_nav_mesh_copy1 = deepcopy(self.nav_meshes[start_floor_num])
-        if end_floor_num == start_floor_num:
-            old_nav_mesh_copy2 = old_nav_mesh_copy1
-        else:
-            old_nav_mesh_copy2 = deepcopy(self.nav_meshes[end_floor_num])
-        old_floor_indexed_nodes = deepcopy(self.__floor_indexed_nodes)
-        old_link_graph_id_indexed_nodes = deepcopy(self.__link_graph_id_indexed_nodes)
+        # The start and end links are removed from the nav meshes again by reset_nav_meshes (with pop_link) rather
+        # than by copying the nav meshes beforehand
         self.nav_meshes[start_floor_num].add_link(start_pos)
         self.nav_meshes[end_floor_num].add_link(end_pos)
         # Link weight can equal 0 as the start and end points are not actual links to be connected to anything, they are
         # simply placed inside the link graph for convenience with pathfinding
-        self.__add_link(start_floor_num, start_link_num, precompute_link_dist, primary_algorithm, 0)
-        self.__add_link(end_floor_num, end_link_num, precompute_link_dist, primary_algorithm, 0)
+        # Same as in join_links
         if link_algorithm == GlobalConstants.BFS:
-            returned = self.link_graph.bfs(self.link_graph.vertices - 1, self.link_graph.vertices - 2)
-        elif link_algorithm == GlobalConstants.DIJKSTRA:
-            returned = self.link_graph.dijkstra(self.link_graph.vertices - 1, self.link_graph.vertices - 2)
-        elif link_algorithm == GlobalConstants.A_STAR:
-            # A* or greedy are unlikely to work well as the heuristic will become meaningless, but I will
-            # still include them as options here just in case
-            returned = self.link_graph.a_star(self.link_graph.vertices - 1, self.link_graph.vertices - 2)
-        elif link_algorithm == GlobalConstants.GREEDY:
-            returned = self.link_graph.greedy(self.link_graph.vertices - 1, self.link_graph.vertices - 2)
-        else:
+            precompute_link_dist = False
+        # The searches are done backwards from the end to the start (so the path can be followed forwards through prev)
+        # and never go back to the end or past the start, so only edges from the end and to the start are needed
+        self.__add_link(start_floor_num, start_link_num, precompute_link_dist, primary_algorithm, 0, outgoing=False)
+        self.__add_link(end_floor_num, end_link_num, precompute_link_dist, primary_algorithm, 0, incoming=False)
+        if link_algorithm not in self.LINK_ALGORITHMS:
             raise Exception("Invalid link algorithm set.")
+        # A* or greedy are unlikely to work well as the heuristic will become meaningless, but I will still include them
+        # as options here just in case
+        link_search = getattr(self.link_graph, self.LINK_ALGORITHMS[link_algorithm])
+        start_vert_id = self.link_graph.vertices - 2
+        end_vert_id = self.link_graph.vertices - 1
+        returned = link_search(end_vert_id, start_vert_id)
         if returned is None:
             # Revert changes
             final_paths = None
         else:
             prev, _ = returned
-            current_vert = self.link_graph.vertices - 2
+            # The path is followed back through prev with a local variable, rather than reading the end of the path
+            # and the number of vertices again every step
+            current_vert = start_vert_id
             link_path = [current_vert]
-            while link_path[-1] != self.link_graph.vertices - 1:
+            while current_vert != end_vert_id:
                 current_vert = prev[current_vert]
                 link_path.append(current_vert)
+            link_graph_nodes = self.__link_graph_id_indexed_nodes
+            if primary_algorithm not in self.PRIMARY_ALGORITHMS:
+                raise Exception("Invalid primary algorithm.")
+            primary_search_name = self.PRIMARY_ALGORITHMS[primary_algorithm]
             for edge_num in range(len(link_path)-1):
                 vert1_id = link_path[edge_num]
                 vert2_id = link_path[edge_num + 1]
-                if (self.__link_graph_id_indexed_nodes[vert1_id].floor_num == self.__link_graph_id_indexed_nodes[
-                        vert2_id].floor_num and not (self.__link_graph_id_indexed_nodes[vert1_id].link_id ==
-                                                     self.__link_graph_id_indexed_nodes[vert2_id].link_id and
-                                                     self.link_graph.get_edge_val(vert1_id, vert2_id) == link_weight)):
+                node1 = link_graph_nodes[vert1_id]
+                node2 = link_graph_nodes[vert2_id]
+                if (node1.floor_num == node2.floor_num and not (node1.link_id == node2.link_id and
+                                                                self.link_graph.get_edge_val(vert1_id, vert2_id) ==
+                                                                link_weight)):
                     # Second check ensure an actual floor path is needed and the links are not just being moved between
-                    floor_num = self.__link_graph_id_indexed_nodes[vert1_id].floor_num
+                    floor_num = node1.floor_num
+                    nav_mesh = self.nav_meshes[floor_num]
                     # Get vertex nav graph ids
-                    vert1_nav_graph_id = self.nav_meshes[floor_num].get_nav_graph_link_id(
-                        self.__link_graph_id_indexed_nodes[vert1_id].link_num)
-                    vert2_nav_graph_id = self.nav_meshes[floor_num].get_nav_graph_link_id(
-                        self.__link_graph_id_indexed_nodes[vert2_id].link_num)
+                    vert1_nav_graph_id = nav_mesh.get_nav_graph_link_id(node1.link_num)
+                    vert2_nav_graph_id = nav_mesh.get_nav_graph_link_id(node2.link_num)
                     # These paths must succeed as have already been precomputed as valid with the link graph
-                    if primary_algorithm == GlobalConstants.A_STAR:
-                        prev, _ = self.nav_meshes[self.__link_graph_id_indexed_nodes[
-                            vert1_id].floor_num].nav_graph.a_star(vert2_nav_graph_id, vert1_nav_graph_id)
-                    elif primary_algorithm == GlobalConstants.DIJKSTRA:
-                        prev, _ = self.nav_meshes[self.__link_graph_id_indexed_nodes[
-                            vert1_id].floor_num].nav_graph.dijkstra(vert2_nav_graph_id, vert1_nav_graph_id)
-                    elif primary_algorithm == GlobalConstants.GREEDY:
-                        prev, _ = self.nav_meshes[self.__link_graph_id_indexed_nodes[
-                            vert1_id].floor_num].nav_graph.greedy(vert2_nav_graph_id, vert1_nav_graph_id)
-                    else:
-                        raise Exception("Invalid primary algorithm.")
+                    prev, _ = getattr(nav_mesh.nav_graph, primary_search_name)(vert2_nav_graph_id, vert1_nav_graph_id)
                     current_vert = vert1_nav_graph_id
                     floor_path = [current_vert]
-                    while floor_path[-1] != vert2_nav_graph_id:
+                    while current_vert != vert2_nav_graph_id:
                         current_vert = prev[current_vert]
                         floor_path.append(current_vert)
                     # In some cases, multiple paths can be on a floor, so to ensure they stay unique, edge_num is used
@@ -314,13 +427,18 @@ class Map:
         # Finally, return everything back to how it was
         self.floors[start_floor_num].links.pop()
         self.floors[end_floor_num].links.pop()
-        for _ in range(2):
-            self.link_graph.delete_vertex(self.link_graph.vertices - 1)
+        # The start and end vertices are the last two in the link graph, so they can be removed together
+        self.__link_graph_id_indexed_nodes.pop(start_vert_id)
+        self.__link_graph_id_indexed_nodes.pop(end_vert_id)
+        self.link_graph.truncate(start_vert_id)
         self.__id_indexed_nodes.pop(self.START)
         self.__id_indexed_nodes.pop(self.END)
-        self.__floor_indexed_nodes = old_floor_indexed_nodes
-        self.__link_graph_id_indexed_nodes = old_link_graph_id_indexed_nodes
-        self.__reset_data = (start_floor_num, end_floor_num, old_nav_mesh_copy1, old_nav_mesh_copy2)
+        # Only the start and end links were added, so just they are removed (end first as it was added last)
+        for floor_num in (end_floor_num, start_floor_num):
+            self.__floor_indexed_nodes[floor_num].pop()
+            if not self.__floor_indexed_nodes[floor_num]:
+                self.__floor_indexed_nodes.pop(floor_num)
+        self.__reset_data = (start_floor_num, end_floor_num)
         return final_paths
 
     def reset_nav_meshes(self):
@@ -329,6 +447,7 @@ class Map:
         # (The canvas updating code could be modified to know to use the start and end position locations if the
         # index is out of range, but this method is easier).
         if self.__reset_data is not None:
-            self.nav_meshes[self.__reset_data[0]] = self.__reset_data[2]
-            self.nav_meshes[self.__reset_data[1]] = self.__reset_data[3]
+            # End link was added last so must be removed first
+            self.nav_meshes[self.__reset_data[1]].pop_link()
+            self.nav_meshes[self.__reset_data[0]].pop_link()
             self.__reset_data = None
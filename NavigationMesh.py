@@ -3,19 +3,37 @@ from Graph import WeightedGraph
 from copy import deepcopy
 from SquareMatrix import SquareMat
 from Floor import Floor
+from numpy import int8, argsort, partition, flatnonzero, empty, array
+from math import sqrt
+from bisect import bisect_right
 
 
 class NavMesh:
 
     THRESHOLD_DIST = 0.01 ** 2
+    # Number of regions sorted first when finding the region a link is in
+    NEAREST_REGIONS = 8
 
     def __init__(self, walls, links, verts_per_edge):
         self.__num_of_links = 0
         self.__nav_mesh = self.__split(walls)
         self.__regions = self.__find_regions()
         self.__region_positions = self.__find_avg_region_positions()
-        self.nav_graph, self.__edge_vert_ids = self.__create_nav_graph(verts_per_edge)
+        # The x and y coordinates of the vertices of every region, as 2D arrays with a row for each region (padded the
+        # way Vec2D.point_in_polygons_xy needs), so a link can be checked against every region at once
+        region_size = max((len(region) for region in self.__regions), default=0)
+        padded_regions = array([region + [region[-1]] * (region_size - len(region)) for region in self.__regions],
+                               dtype=int).reshape(len(self.__regions), region_size)
+        region_vertex_positions = self.__nav_mesh.positions[padded_regions]
+        self.__region_xs = region_vertex_positions[:, :, 0]
+        self.__region_ys = region_vertex_positions[:, :, 1]
+        # The nav graph vertices on the edges of each region that are shared with other regions are kept, so links only
+        # need joining to them rather than looking for the region's shared edges again every time a link is added
+        self.nav_graph, self.__region_edge_vert_ids = self.__create_nav_graph(verts_per_edge)
         self.__region_indexed_links = dict()
+        # Region each link was added to (or None if it was not in one) in the order they were added, so the most
+        # recently added link can be removed again by pop_link
+        self.__link_region_nums = []
         self.__add_links_to_nav_graph(links)
         self.old_nav_graph = None
 
@@ -31,170 +49,200 @@ class NavMesh:
     def add_link(self, point):
         self.__num_of_links += 1
         self.nav_graph.add_vertex(point)
-        sorted_regions_nums = self.__sort_region_nums_by_dist_from(point)
-        for region_num in sorted_regions_nums:
-            region = self.__regions[region_num]
-            if Vec2D.point_in_polygon(point, [self.__nav_mesh.vertex_positions[vert_id] for vert_id in region]):
-                # Join to links sharing region
-                if region_num in self.__region_indexed_links.keys():
-                    for vert_id in self.__region_indexed_links[region_num]:
-                        self.nav_graph.set_edge(vert_id, self.nav_graph.vertices - 1, Vec2D.distance_between(
-                            self.nav_graph.vertex_positions[vert_id], self.nav_graph.vertex_positions[
-                                self.nav_graph.vertices - 1]))
-                    self.__region_indexed_links[region_num].append(self.nav_graph.vertices - 1)
-                else:
-                    self.__region_indexed_links[region_num] = [self.nav_graph.vertices - 1]
-                # Also join to links sharing edges
-                for region_edge_num in range(len(region)):
-                    vert1_id = region[region_edge_num]
-                    # vert2_id must wrap back to 0 for the edge between the first and last vertices in the region
-                    vert2_id = region[(region_edge_num + 1) % len(region)]
-                    if self.__nav_mesh.get_edge_val(vert1_id, vert2_id) == 3:
-                        # nav_mesh is symmetrical so swapping vert ids should give same key
-                        if vert1_id > vert2_id:
-                            dict_key = (vert1_id, vert2_id)
-                        else:
-                            dict_key = (vert2_id, vert1_id)
-                        for vert_id in self.__edge_vert_ids[dict_key]:
-                            self.nav_graph.set_edge(vert_id, self.nav_graph.vertices - 1, Vec2D.distance_between(
-                                self.nav_graph.vertex_positions[vert_id], self.nav_graph.vertex_positions[
-                                    self.nav_graph.vertices - 1]))
-                # Link can only be in one region
-                return
+        self.__link_region_nums.append(None)
+        # Looked up once here rather than every time they are used in the loops
+        nav_graph = self.nav_graph
+        new_vert_id = nav_graph.vertices - 1
+        vertex_positions = nav_graph.vertex_positions
+        # Every region is checked at once, and the regions are only sorted by distance if the point is in more than one
+        # of them (on an edge they share), where the closest is used
+        containing_region_nums = flatnonzero(Vec2D.point_in_polygons_xy(point.x, point.y, self.__region_xs,
+                                                                        self.__region_ys)).tolist()
+        if not containing_region_nums:
+            return
+        if len(containing_region_nums) > 1:
+            region_num = next(region_num for region_num in self.__sort_region_nums_by_dist_from(point)
+                              if region_num in containing_region_nums)
+        else:
+            region_num = containing_region_nums[0]
+        # Join to links sharing region, and also to links sharing edges
+        if region_num in self.__region_indexed_links.keys():
+            vert_ids = self.__region_indexed_links[region_num] + self.__region_edge_vert_ids[region_num]
+            self.__region_indexed_links[region_num].append(new_vert_id)
+        else:
+            vert_ids = self.__region_edge_vert_ids[region_num]
+            self.__region_indexed_links[region_num] = [new_vert_id]
+        self.__link_region_nums[-1] = region_num
+        # All the edges are set at once. The distances are calculated from the coordinates directly in the same
+        # way as Vec2D.distance_between (rather than with NumPy, whose squares can differ very slightly from
+        # Python's) so they stay equal to the heuristic
+        x = point.x
+        y = point.y
+        nav_graph.set_edges(vert_ids, new_vert_id, [sqrt((vertex_positions[vert_id].x - x) ** 2 +
+                                                         (vertex_positions[vert_id].y - y) ** 2)
+                                                    for vert_id in vert_ids])
+
+    def pop_link(self):
+        # Undoes the most recent add_link, which is much cheaper than copying the whole nav mesh before adding a link
+        # and going back to the copy after
+        # The link is the last vertex in the nav graph, so deleting it also deletes all the edges it was given
+        self.__num_of_links -= 1
+        self.nav_graph.truncate(self.nav_graph.vertices - 1)
+        region_num = self.__link_region_nums.pop()
+        if region_num is not None:
+            self.__region_indexed_links[region_num].pop()
+            if not self.__region_indexed_links[region_num]:
+                self.__region_indexed_links.pop(region_num)
 
     def __sort_region_nums_by_dist_from(self, position):
-        # Sorts the list of regions by their respective distances from position
-        sorted_region_nums = list(range(len(self.__regions)))
-        sorted_region_nums.sort(key=lambda region_num: Vec2D.squared_distance_between(position,
-                                self.__region_positions[region_num]))
-        sorted_region_nums = [region_num for region_num in sorted_region_nums]
-        return sorted_region_nums
+        # Goes through the regions in order of their respective distances from position
+        # The squared distances to every region are found at once with NumPy, and a stable sort keeps regions the same
+        # distance away in order of region number, like sorting the list of region numbers would
+        squared_dists = ((self.__region_positions - (position.x, position.y)) ** 2).sum(1)
+        if len(squared_dists) <= self.NEAREST_REGIONS:
+            yield from argsort(squared_dists, kind="stable").tolist()
+            return
+        # The point is nearly always in one of the closest few regions, so only those are sorted to begin with, and the
+        # rest are only sorted if none of them contain it. Every region tied with the furthest of the closest few is
+        # included, so the order comes out exactly the same as sorting all of them
+        furthest_near_dist = partition(squared_dists, self.NEAREST_REGIONS - 1)[self.NEAREST_REGIONS - 1]
+        for region_nums in (flatnonzero(squared_dists <= furthest_near_dist),
+                            flatnonzero(squared_dists > furthest_near_dist)):
+            yield from region_nums[argsort(squared_dists[region_nums], kind="stable")].tolist()
 
     def edit_weight(self, master, edit_pos):
         # Edits weight of edge on nav graph at edit_pos
-        for vert1_id in range(self.nav_graph.vertices):
-            for vert2_id in range(vert1_id):
-                # Need to include edges of -1 weight
-                if self.nav_graph.get_edge_val(vert1_id, vert2_id) != 0:
-                    # Gets closest point on the line of the edge
-                    clamped_vert_pos = Vec2D.get_closest_point(self.nav_graph.vertex_positions[vert1_id],
-                                                               self.nav_graph.vertex_positions[vert2_id], edit_pos)
-                    if (clamped_vert_pos is not None and Vec2D.squared_distance_between(clamped_vert_pos, edit_pos) <
-                            self.THRESHOLD_DIST):
-                        # If this is not the case, the user may have still clicked near an edge, but it will be close
-                        # to the end of it and therefore is ambiguous between multiple edges, so should be ignored
-                        prev_weight1 = self.nav_graph.get_edge_val(vert1_id, vert2_id)
-                        prev_weight2 = self.nav_graph.get_edge_val(vert2_id, vert1_id)
-                        if prev_weight1 != -1 and prev_weight2 != -1:
-                            # Edge is bi-directional
-                            new_weight = master.get_float("Previous weight was " + str(round(prev_weight1*10, 2)) +
-                                                          "\nEnter new weight:")
-                            if new_weight is not None:
-                                if new_weight > 0:
-                                    self.nav_graph.set_edge(vert1_id, vert2_id, new_weight/10,
-                                                            update_heuristic_scale=True)
-                                else:
-                                    master.info("Weights less than or equal to 0 are not valid.")
-                            pass
-                        elif prev_weight1 != -1:
-                            # Edge is uni-directional from vert1 to vert2
-                            new_weight = master.get_float("Previous weight was " + str(round(prev_weight1 * 10, 2)) +
-                                                          "\nEnter new weight:")
-                            if new_weight is not None:
-                                if new_weight > 0:
-                                    self.nav_graph.set_edge(vert1_id, vert2_id, new_weight/10, bi_directional=False)
-                                else:
-                                    master.info("Weights less than or equal to 0 are not valid.")
-                            pass
-                        elif prev_weight2 != -1:
-                            # Edge is uni-directional from vert2 to vert1
-                            new_weight = master.get_float("Previous weight was " + str(round(prev_weight2 * 10, 2)) +
-                                                          "\nEnter new weight:")
-                            if new_weight is not None:
-                                if new_weight > 0:
-                                    self.nav_graph.set_edge(vert2_id, vert1_id, new_weight/10, bi_directional=False)
-                                else:
-                                    master.info("Weights less than or equal to 0 are not valid.")
-                        else:
-                            # Edge was blocked
-                            new_weight = master.get_float("Edge was previously blocked\nEnter new weight:")
-                            if new_weight is not None:
-                                if new_weight > 0:
-                                    self.nav_graph.set_edge(vert1_id, vert2_id, new_weight/10)
-                                else:
-                                    master.info("Weights less than or equal to 0 are not valid.")
-                        return
+        edge = self.__find_edge_at(edit_pos)
+        if edge is not None:
+            vert1_id, vert2_id = edge
+            prev_weight1 = self.nav_graph.get_edge_val(vert1_id, vert2_id)
+            prev_weight2 = self.nav_graph.get_edge_val(vert2_id, vert1_id)
+            if prev_weight1 != -1 and prev_weight2 != -1:
+                # Edge is bi-directional
+                new_weight = master.get_float("Previous weight was " + str(round(prev_weight1*10, 2)) +
+                                              "\nEnter new weight:")
+                if new_weight is not None:
+                    if new_weight > 0:
+                        self.nav_graph.set_edge(vert1_id, vert2_id, new_weight/10, update_heuristic_scale=True)
+                    else:
+                        master.info("Weights less than or equal to 0 are not valid.")
+                pass
+            elif prev_weight1 != -1:
+                # Edge is uni-directional from vert1 to vert2
+                new_weight = master.get_float("Previous weight was " + str(round(prev_weight1 * 10, 2)) +
+                                              "\nEnter new weight:")
+                if new_weight is not None:
+                    if new_weight > 0:
+                        self.nav_graph.set_edge(vert1_id, vert2_id, new_weight/10, bi_directional=False)
+                    else:
+                        master.info("Weights less than or equal to 0 are not valid.")
+                pass
+            elif prev_weight2 != -1:
+                # Edge is uni-directional from vert2 to vert1
+                new_weight = master.get_float("Previous weight was " + str(round(prev_weight2 * 10, 2)) +
+                                              "\nEnter new weight:")
+                if new_weight is not None:
+                    if new_weight > 0:
+                        self.nav_graph.set_edge(vert2_id, vert1_id, new_weight/10, bi_directional=False)
+                    else:
+                        master.info("Weights less than or equal to 0 are not valid.")
+            else:
+                # Edge was blocked
+                new_weight = master.get_float("Edge was previously blocked\nEnter new weight:")
+                if new_weight is not None:
+                    if new_weight > 0:
+                        self.nav_graph.set_edge(vert1_id, vert2_id, new_weight/10)
+                    else:
+                        master.info("Weights less than or equal to 0 are not valid.")
 
     def change_direction(self, master, change_pos):
         # Changes direction of edge on nav graph at change_pos
         # Cycles between bi-directional, uni-directional from vert1 to vert2 and uni-directional from vert2 to vert1
-        for vert1_id in range(self.nav_graph.vertices):
-            for vert2_id in range(vert1_id):
-                # Need to include edges of -1 weight
-                if self.nav_graph.get_edge_val(vert1_id, vert2_id) != 0:
-                    # Gets closest point on the line of the edge
-                    clamped_vert_pos = Vec2D.get_closest_point(self.nav_graph.vertex_positions[vert1_id],
-                                                               self.nav_graph.vertex_positions[vert2_id], change_pos)
-                    if (clamped_vert_pos is not None and Vec2D.squared_distance_between(clamped_vert_pos, change_pos) <
-                            self.THRESHOLD_DIST):
-                        # If this is not the case, the user may have still clicked near an edge, but it will be close
-                        # to the end of it and therefore is ambiguous between multiple edges, so should be ignored
-                        prev_weight1 = self.nav_graph.get_edge_val(vert1_id, vert2_id)
-                        prev_weight2 = self.nav_graph.get_edge_val(vert2_id, vert1_id)
-                        if prev_weight1 != -1 and prev_weight2 != -1:
-                            # Edge was bi-directional
-                            self.nav_graph.set_edge(vert2_id, vert1_id, -1, bi_directional=False)
-                        elif prev_weight1 != -1:
-                            # Edge was uni-directional from vert1 to vert2
-                            self.nav_graph.set_edge(vert1_id, vert2_id, -1, bi_directional=False)
-                            self.nav_graph.set_edge(vert2_id, vert1_id, prev_weight1, bi_directional=False)
-                        elif prev_weight2 != -1:
-                            # Edge was uni-directional from vert2 to vert1
-                            self.nav_graph.set_edge(vert1_id, vert2_id, prev_weight2, bi_directional=False)
-                        else:
-                            # Edge is blocked
-                            master.info("Cannot change direction of blocked edge.")
-                        return
+        edge = self.__find_edge_at(change_pos)
+        if edge is not None:
+            vert1_id, vert2_id = edge
+            prev_weight1 = self.nav_graph.get_edge_val(vert1_id, vert2_id)
+            prev_weight2 = self.nav_graph.get_edge_val(vert2_id, vert1_id)
+            if prev_weight1 != -1 and prev_weight2 != -1:
+                # Edge was bi-directional
+                self.nav_graph.set_edge(vert2_id, vert1_id, -1, bi_directional=False)
+            elif prev_weight1 != -1:
+                # Edge was uni-directional from vert1 to vert2
+                self.nav_graph.set_edge(vert1_id, vert2_id, -1, bi_directional=False)
+                self.nav_graph.set_edge(vert2_id, vert1_id, prev_weight1, bi_directional=False)
+            elif prev_weight2 != -1:
+                # Edge was uni-directional from vert2 to vert1
+                self.nav_graph.set_edge(vert1_id, vert2_id, prev_weight2, bi_directional=False)
+            else:
+                # Edge is blocked
+                master.info("Cannot change direction of blocked edge.")
 
     def block_path(self, master, block_pos):
         # Blocks edge on nav graph
-        for vert1_id in range(self.nav_graph.vertices):
-            for vert2_id in range(vert1_id):
-                # Weights of -1 must also be checked for
-                if self.nav_graph.get_edge_val(vert1_id, vert2_id) != 0:
-                    # Gets closest point on the line of the edge
-                    clamped_vert_pos = Vec2D.get_closest_point(self.nav_graph.vertex_positions[vert1_id],
-                                                               self.nav_graph.vertex_positions[vert2_id], block_pos)
-                    if (clamped_vert_pos is not None and Vec2D.squared_distance_between(clamped_vert_pos, block_pos) <
-                            self.THRESHOLD_DIST):
-                        # If this is not the case, the user may have still clicked near an edge, but it will be close
-                        # to the end of it and therefore is ambiguous between multiple edges, so should be ignored
-                        prev_weight1 = self.nav_graph.get_edge_val(vert1_id, vert2_id)
-                        prev_weight2 = self.nav_graph.get_edge_val(vert2_id, vert1_id)
-                        if prev_weight1 != -1 or prev_weight2 != -1:
-                            self.nav_graph.set_edge(vert1_id, vert2_id, -1)
-                        else:
-                            # Edge is blocked
-                            master.info("Edge is already blocked.")
-                        return
+        edge = self.__find_edge_at(block_pos)
+        if edge is not None:
+            vert1_id, vert2_id = edge
+            prev_weight1 = self.nav_graph.get_edge_val(vert1_id, vert2_id)
+            prev_weight2 = self.nav_graph.get_edge_val(vert2_id, vert1_id)
+            if prev_weight1 != -1 or prev_weight2 != -1:
+                self.nav_graph.set_edge(vert1_id, vert2_id, -1)
+            else:
+                # Edge is blocked
+                master.info("Edge is already blocked.")
+
+    def __find_edge_at(self, position):
+        # Returns (vert1_id, vert2_id) of the first edge (in the order of looping over vert1 and then every
+        # vert2 < vert1) that position is within the threshold distance of, including blocked edges, or None if there
+        # is none
+        # Only edges with position inside their bounding box expanded by the threshold distance could be close enough,
+        # so the rest are thrown out at once with NumPy before the distance to each of those left is checked
+        # The edges' bounding boxes are cached by the nav graph, so clicking again does not work them out again
+        radius = sqrt(self.THRESHOLD_DIST)
+        segments = self.nav_graph.get_edge_segments(include_blocked=True)
+        vert1_ids = segments.vert1_ids
+        vert2_ids = segments.vert2_ids
+        mins = segments.mins - radius
+        maxs = segments.maxs + radius
+        x = position.x
+        y = position.y
+        near = (mins[:, 0] <= x) & (maxs[:, 0] >= x) & (mins[:, 1] <= y) & (maxs[:, 1] >= y)
+        vertex_positions = self.nav_graph.vertex_positions
+        for edge_num in flatnonzero(near).tolist():
+            vert1_id = int(vert1_ids[edge_num])
+            vert2_id = int(vert2_ids[edge_num])
+            vert1_pos = vertex_positions[vert1_id]
+            vert2_pos = vertex_positions[vert2_id]
+            # Gets closest point on the line of the edge
+            clamped_vert_pos = Vec2D.get_closest_point_xy(vert1_pos.x, vert1_pos.y, vert2_pos.x, vert2_pos.y, x, y)
+            # If the closest point is not within the edge, the user may have still clicked near it, but it will be close
+            # to the end of it and therefore is ambiguous between multiple edges, so should be ignored
+            if (clamped_vert_pos is not None and (clamped_vert_pos[0] - x) ** 2 + (clamped_vert_pos[1] - y) ** 2 <
+                    self.THRESHOLD_DIST):
+                return vert1_id, vert2_id
+        return None
 
     def __create_nav_graph(self, verts_per_edge):
         # Creates the navigation graph using the nav mesh and the region list
+        # Also returns a list, for each region, of the vertices on its shared edges (the vertices connected together in
+        # that region)
         nav_graph = WeightedGraph()
         edge_vert_ids = dict()
+        region_edge_vert_ids = []
         for region in self.__regions:
             to_connect = []
+            region_edge_vert_ids.append(to_connect)
             for region_edge_num in range(len(region)):
                 vert1_id = region[region_edge_num]
                 # vert2_id must wrap back to 0 for the edge between the first and last vertices in the region
                 vert2_id = region[(region_edge_num + 1) % len(region)]
                 if self.__nav_mesh.get_edge_val(vert1_id, vert2_id) == 3:
                     # nav_mesh is symmetrical so swapping vert ids should give same key
+                    # Both ids are packed into one int rather than a tuple, as it is quicker to make and hash
                     if vert1_id > vert2_id:
-                        dict_key = (vert1_id, vert2_id)
+                        dict_key = vert1_id << 32 | vert2_id
                     else:
-                        dict_key = (vert2_id, vert1_id)
-                    if dict_key in edge_vert_ids.keys():
+                        dict_key = vert2_id << 32 | vert1_id
+                    if dict_key in edge_vert_ids:
                         for vert_id in edge_vert_ids[dict_key]:
                             to_connect.append(vert_id)
                     else:
@@ -209,30 +257,36 @@ class NavMesh:
                             to_connect.append(nav_graph.vertices - 1)
                             edge_vert_ids[dict_key].append(nav_graph.vertices - 1)
             # All connected vertices must be joined in the navigation graph
-            for vert1_id in to_connect:
-                for vert2_id in to_connect:
-                    if not vert1_id == vert2_id:
-                        vert1_pos = nav_graph.vertex_positions[vert1_id]
-                        vert2_pos = nav_graph.vertex_positions[vert2_id]
-                        # Euclidean distance is used to calculate the weight of the new edge
-                        nav_graph.set_edge(vert1_id, vert2_id, Vec2D.distance_between(vert1_pos, vert2_pos))
-        return nav_graph, edge_vert_ids
+            # The edges are bi-directional and the distance is the same both ways, so each pair only needs setting once,
+            # and the edges from each vertex to all the ones after it are set together
+            vertex_positions = nav_graph.vertex_positions
+            for i, vert1_id in enumerate(to_connect):
+                vert1_pos = vertex_positions[vert1_id]
+                vert2_ids = to_connect[i + 1:]
+                # Euclidean distance is used to calculate the weight of the new edge, calculated from the coordinates
+                # directly in the same way as Vec2D.distance_between to avoid creating a Vec2D
+                nav_graph.set_edges(vert2_ids, vert1_id, [sqrt((vert1_pos.x - vertex_positions[vert2_id].x) ** 2 +
+                                                               (vert1_pos.y - vertex_positions[vert2_id].y) ** 2)
+                                                          for vert2_id in vert2_ids])
+        return nav_graph, region_edge_vert_ids
 
     def __find_avg_region_positions(self):
         # Gets the average position of each region which can be used as a heuristic to accelerate finding which region a
         # point is within
-        region_positions = []
-        for region in self.__regions:
+        # Returned as a NumPy array with a row of (x, y) for each region so the distances to them can be vectorised
+        region_positions = empty((len(self.__regions), 2))
+        for region_num, region in enumerate(self.__regions):
             avg_pos = Vec2D(0, 0)
             for vert_id in region:
                 avg_pos = Vec2D.add(avg_pos, self.__nav_mesh.vertex_positions[vert_id])
-            region_positions.append(avg_pos.scalar_multiply(1 / len(region)))
+            avg_pos = avg_pos.scalar_multiply(1 / len(region))
+            region_positions[region_num] = avg_pos.x, avg_pos.y
         return region_positions
 
     def __find_regions(self):
         # Finds all the regions and adds them to the region list
         # Region matrix stores how many regions each vertex is in
-        region_matrix = SquareMat(self.__nav_mesh.vertices)
+        region_matrix = SquareMat(self.__nav_mesh.vertices, dtype=int8)
         regions = []
         # Initialises all outer edges with value 1 as they cannot be in more than one region (in essence, the outside of
         # the graph is a region itself but is not useful to find and is obviously not convex.)
@@ -259,10 +313,14 @@ class NavMesh:
                 for vert2_id in range(vert1_id):
                     if (weighted_nav_mesh.get_edge(vert1_id, vert2_id) and region_matrix.get_item(vert1_id, vert2_id)
                             == pass_num):
-                        graph_copy = deepcopy(weighted_nav_mesh)
-                        # Removes the edge between vert1 and vert2, requiring the shortest cycle to be found
-                        graph_copy.set_edge(vert1_id, vert2_id, 0)
-                        prev, distances = graph_copy.a_star(vert1_id, vert2_id)
+                        # Ignores the edge between vert1 and vert2, requiring the shortest cycle to be found
+                        # The search just skips the edge, so the graph does not have to be copied or changed and put
+                        # back for every edge
+                        # Equal length cycles must be found in the same order as always, so the regions and the ids
+                        # of the nav graph vertices do not change (see WeightedGraph.__a_star_binary_heap)
+                        prev, distances = weighted_nav_mesh.a_star(vert1_id, vert2_id,
+                                                                   ignored_edge=(vert1_id, vert2_id),
+                                                                   binary_heap_order=True)
                         #  Work backwards through prev to get the shortest path and therefore, the region
                         path = [vert2_id]
                         region_matrix.set_item(vert1_id, vert2_id, region_matrix.get_item(vert1_id, vert2_id) + 1)
@@ -287,13 +345,20 @@ class NavMesh:
     @staticmethod
     def __weight_euclidean(nav_mesh):
         weighted_graph = WeightedGraph(nav_mesh.vertex_positions)
-        for vert1_id in range(nav_mesh.vertices):
-            # Assuming graph no one-way edges
-            for vert2_id in range(vert1_id):
-                if nav_mesh.get_edge(vert1_id, vert2_id):
-                    weighted_graph.set_edge(vert1_id, vert2_id,
-                                            Vec2D.distance_between(nav_mesh.vertex_positions[vert1_id],
-                                                                   nav_mesh.vertex_positions[vert2_id]))
+        # Assuming graph no one-way edges
+        # Only the edges that exist are gone through (from the cached edge arrays, in the same order as looping over
+        # every pair of vertices) rather than every pair of vertices
+        # The lengths are calculated from the coordinates directly in the same way as Vec2D.distance_between. NumPy is
+        # not used for this as its squares can differ very slightly from Python's, which would change the weights
+        # All the edges are then set at once
+        vertex_positions = nav_mesh.vertex_positions
+        vert1_ids, vert2_ids = nav_mesh.get_edge_arrays()
+        vert1_ids = vert1_ids.tolist()
+        vert2_ids = vert2_ids.tolist()
+        weighted_graph.set_edge_pairs(vert1_ids, vert2_ids, [
+            sqrt((vertex_positions[vert1_id].x - vertex_positions[vert2_id].x) ** 2 +
+                 (vertex_positions[vert1_id].y - vertex_positions[vert2_id].y) ** 2)
+            for vert1_id, vert2_id in zip(vert1_ids, vert2_ids)])
         return weighted_graph
 
     @staticmethod
@@ -302,46 +367,55 @@ class NavMesh:
         # Checked is the set of vertex pairs that have been checked so performance is not wasted re-checking edges
         # The input graph will be edited and so must be deep copied
         split_graph = deepcopy(graph)
-        checked = SquareMat(split_graph.vertices)
+        checked = SquareMat(split_graph.vertices, dtype=int8)
         edge_added = True
+        positions = split_graph.positions
+        # Only vertices that have been given new edges can have pairs that still need checking, so only those are
+        # looked at again. Vertices given edges later in the pass than the current one are checked in the same pass,
+        # and the rest in the next, which is the same order as checking every vertex each pass
+        to_check = [True] * split_graph.vertices
         while edge_added:
             edge_added = False
             for vert1_id in range(split_graph.vertices):
-                vert1_pos = split_graph.vertex_positions[vert1_id]
+                if not to_check[vert1_id]:
+                    continue
+                to_check[vert1_id] = False
                 # First make sure vertex is not on the outer edge
-                for vert2_id in range(split_graph.vertices):
-                    if split_graph.get_edge_val(vert1_id, vert2_id) == 2:
-                        # Vertex is on outer edge, so ignore
-                        break
-                else:
-                    # Vertex is not on outer edge
-                    for vert2_id in range(split_graph.vertices):
-                        if checked.get_item(vert1_id, vert2_id) == 0 and split_graph.get_edge(vert1_id, vert2_id):
-                            checked.set_item(vert1_id, vert2_id, 1, mirrored=False)
-                            right_found = False
-                            left_found = False
-                            vert2_pos = split_graph.vertex_positions[vert2_id]
-                            edge1_vec = Vec2D.sub(vert2_pos, vert1_pos)
-                            for vert3_id in range(split_graph.vertices):
-                                if split_graph.get_edge(vert1_id, vert3_id):
-                                    vert3_pos = split_graph.vertex_positions[vert3_id]
-                                    edge2_vec = Vec2D.sub(vert3_pos, vert1_pos)
-                                    # A positive perp dot product means the vector is to the left, a negative perp dot
-                                    # product means it is to the right, a perp dot product of 0 means it has the same or
-                                    # opposite direction
-                                    if Vec2D.perp_dot_prod(edge1_vec, edge2_vec) > 0:
-                                        right_found = True
-                                    elif Vec2D.perp_dot_prod(edge1_vec, edge2_vec) < 0:
-                                        left_found = True
-                                    if right_found and left_found:
-                                        # If edges to the left and right are found, then it does not need to be checked
-                                        break
-                            else:
-                                edge_added = True
-                                for vert3_id in NavMesh.__find_pot_vert(split_graph, vert1_id, vert2_id, right_found,
-                                                                        left_found):
-                                    split_graph.set_edge(vert1_id, vert3_id, 3)
-                                continue
+                # Only the vertices with edges to vert1 are checked, rather than every vertex
+                if any(split_graph.get_edge_val(vert1_id, vert2_id) == 2 for vert2_id in
+                       split_graph.get_neighbours(vert1_id)):
+                    # Vertex is on outer edge, so ignore
+                    continue
+                # Vertex is not on outer edge
+                vert2_ids = sorted(split_graph.get_neighbours(vert1_id))
+                vert2_index = 0
+                while vert2_index < len(vert2_ids):
+                    vert2_id = vert2_ids[vert2_index]
+                    vert2_index += 1
+                    if checked.get_item(vert1_id, vert2_id) == 0:
+                        checked.set_item(vert1_id, vert2_id, 1, mirrored=False)
+                        # The perp dot products of the edge with every edge from vert1 are found at once with NumPy
+                        # A positive perp dot product means the vector is to the left, a negative perp dot product means
+                        # it is to the right, a perp dot product of 0 means it has the same or opposite direction
+                        vert1_pos = positions[vert1_id]
+                        edge1_vec = positions[vert2_id] - vert1_pos
+                        edge2_vecs = positions[vert2_ids] - vert1_pos
+                        perp_dot_prods = edge1_vec[0] * edge2_vecs[:, 1] - edge1_vec[1] * edge2_vecs[:, 0]
+                        right_found = bool((perp_dot_prods > 0).any())
+                        left_found = bool((perp_dot_prods < 0).any())
+                        # If edges to the left and right are found, then it does not need to be checked
+                        if not (right_found and left_found):
+                            edge_added = True
+                            for vert3_id in NavMesh.__find_pot_vert(split_graph, vert1_id, vert2_id, right_found,
+                                                                    left_found):
+                                split_graph.set_edge(vert1_id, vert3_id, 3)
+                                to_check[vert3_id] = True
+                            # Any new edges before vert2 are not checked until the next pass
+                            to_check[vert1_id] = True
+                            # The new edges must also be checked in this pass if they come after vert2, like they
+                            # would be when looping over every vertex
+                            vert2_ids = sorted(split_graph.get_neighbours(vert1_id))
+                            vert2_index = bisect_right(vert2_ids, vert2_id)
         return split_graph
 
     @staticmethod
@@ -349,26 +423,26 @@ class NavMesh:
         # Returns a list of 1 or 2 vertices to join vert1 to
         vert1_pos = graph.vertex_positions[vert1_id]
         vert2_pos = graph.vertex_positions[vert2_id]
-        edge1_vec = Vec2D.sub(vert2_pos, vert1_pos)
+        # The loop below works with the components of the edge vectors directly, so no new Vec2Ds or static method calls
+        # are needed for every vertex it looks at
+        edge1_x = vert2_pos.x - vert1_pos.x
+        edge1_y = vert2_pos.y - vert1_pos.y
         join_verts = []
         # Sorts vertex ids, excluding vert1 and 2, by squared distance from vert 1
-        sorted_verts = list(range(graph.vertices))
-        sorted_verts.pop(vert1_id)
-        # Offset by 1 if vert1_id < vert2_id as the index moves
-        sorted_verts.pop(vert2_id - int(vert1_id < vert2_id))
-        sorted_verts.sort(key=lambda sort_vert_id: Vec2D.squared_distance_between(vert1_pos, graph.vertex_positions[
-            sort_vert_id]))
+        # The squared distances to every vertex are found at once with NumPy. A stable sort is used so vertices the same
+        # distance away stay in order of id like they would with list.sort
+        positions = graph.positions
+        sorted_verts = argsort(((positions - positions[vert1_id]) ** 2).sum(1), kind="stable")
+        sorted_verts = sorted_verts[(sorted_verts != vert1_id) & (sorted_verts != vert2_id)].tolist()
         for vert3_id in sorted_verts:
             vert3_pos = graph.vertex_positions[vert3_id]
-            edge2_vec = Vec2D.sub(vert3_pos, vert1_pos)
-            if (not right_found and not graph.get_edge(vert1_id, vert3_id) and Vec2D.perp_dot_prod(edge1_vec, edge2_vec)
-                    > 0):
+            perp_dot_prod = edge1_x * (vert3_pos.y - vert1_pos.y) - edge1_y * (vert3_pos.x - vert1_pos.x)
+            if not right_found and not graph.get_edge(vert1_id, vert3_id) and perp_dot_prod > 0:
                 # Check or edges to see if there is an intersection
                 if not Floor.check_for_intersections(graph, vert1_id, vert3_id, skip_case_1=True):
                     join_verts.append(vert3_id)
                     right_found = True
-            elif (not left_found and not graph.get_edge(vert1_id, vert3_id) and Vec2D.perp_dot_prod(edge1_vec,
-                                                                                                    edge2_vec) < 0):
+            elif not left_found and not graph.get_edge(vert1_id, vert3_id) and perp_dot_prod < 0:
                 if not Floor.check_for_intersections(graph, vert1_id, vert3_id, skip_case_1=True):
                     join_verts.append(vert3_id)
                     left_found = True
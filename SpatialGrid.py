@@ -0,0 +1,45 @@
+from math import floor
+
+
+class SpatialGrid:
+    # Uniform grid that buckets ids by the cell their position falls in, so everything within cell_size of a position
+    # can be found by only looking at the 3x3 block of cells around it instead of at every single item
+    def __init__(self, cell_size):
+        self.__cell_size = cell_size
+        self.__cells = dict()
+
+    def __get_cell(self, position):
+        return floor(position.x / self.__cell_size), floor(position.y / self.__cell_size)
+
+    def clear(self):
+        self.__cells = dict()
+
+    def insert(self, item_id, position):
+        cell = self.__get_cell(position)
+        if cell in self.__cells.keys():
+            self.__cells[cell].append(item_id)
+        else:
+            self.__cells[cell] = [item_id]
+
+    def remove(self, item_id, position):
+        cell = self.__get_cell(position)
+        self.__cells[cell].remove(item_id)
+        if not self.__cells[cell]:
+            self.__cells.pop(cell)
+
+    def query(self, position):
+        # Returns all ids in the cells around position; this is guaranteed to include every id within cell_size of
+        # position, but can also include some further away, so the distances must still be checked
+        cell_x, cell_y = self.__get_cell(position)
+        found_ids = []
+        for x in range(cell_x - 1, cell_x + 2):
+            for y in range(cell_y - 1, cell_y + 2):
+                if (x, y) in self.__cells.keys():
+                    found_ids.extend(self.__cells[(x, y)])
+        return found_ids
+
+    def shift_ids_down(self, deleted_id):
+        # Items are stored in lists elsewhere, so when one is deleted (and removed from the grid), all items after it
+        # move down by one and the ids in the grid must as well
+        for cell, item_ids in self.__cells.items():
+            self.__cells[cell] = [item_id - int(item_id > deleted_id) for item_id in item_ids]
@@ -1,27 +1,68 @@
+from numpy import zeros, full, float64
+
+
 class SquareMat:
     # Matrix of values, with equal width and height
-    def __init__(self, size, default_val=0):
+    # Stored as a 2D NumPy array rather than a list of lists, so every cell is a plain number in one block of memory
+    # rather than a separate Python object. The array has spare capacity which is doubled when it runs out so expanding
+    # the matrix does not have to copy the whole thing every time
+    # __slots__ stops every matrix from needing its own dictionary of attributes
+    __slots__ = ("__size", "__matrix_data")
+
+    def __init__(self, size, default_val=0, dtype=float64):
         # Matrix is initialised populated with default_val
-        self.__matrix_data = [[default_val for _ in range(size)] for _ in range(size)]
+        self.__size = size
+        self.__matrix_data = full((max(size, 4), max(size, 4)), default_val, dtype=dtype)
 
     @property
     def size(self):
-        return len(self.__matrix_data)
+        return self.__size
+
+    @property
+    def data(self):
+        # Returns the used part of the matrix as a NumPy array - this is a view so should not be edited
+        return self.__matrix_data[:self.__size, :self.__size]
 
     def get_item(self, x, y):
-        return self.__matrix_data[x][y]
+        # item returns a Python number rather than a NumPy one
+        return self.__matrix_data.item(x, y)
 
     def set_item(self, x, y, num, mirrored=True):
-        self.__matrix_data[x][y] = num
+        self.__matrix_data[x, y] = num
         if mirrored:
-            self.__matrix_data[y][x] = num
+            self.__matrix_data[y, x] = num
+
+    def set_items(self, xs, y, nums, mirrored=True):
+        # Sets the items at (x, y) for every x in xs at once with NumPy, nums being the list of new values for each
+        self.__matrix_data[xs, y] = nums
+        if mirrored:
+            self.__matrix_data[y, xs] = nums
+
+    def set_item_pairs(self, xs, ys, nums, mirrored=True):
+        # Sets the item at (xs[i], ys[i]) to nums[i] for every i at once with NumPy
+        self.__matrix_data[xs, ys] = nums
+        if mirrored:
+            self.__matrix_data[ys, xs] = nums
 
     def expand(self, default_val=0):
-        for row_num in range(self.size):
-            self.__matrix_data[row_num].append(default_val)
-        self.__matrix_data.append([default_val for _ in range(self.size+1)])
+        if self.__size == len(self.__matrix_data):
+            new_matrix_data = zeros((2 * self.__size, 2 * self.__size), dtype=self.__matrix_data.dtype)
+            new_matrix_data[:self.__size, :self.__size] = self.data
+            self.__matrix_data = new_matrix_data
+        # The spare capacity could have anything in it, so the new row and column must be set
+        self.__matrix_data[self.__size, :self.__size + 1] = default_val
+        self.__matrix_data[:self.__size + 1, self.__size] = default_val
+        self.__size += 1
 
     def delete_row_column(self, row_col_num):
-        self.__matrix_data.pop(row_col_num)
-        for row_num in range(self.size):
-            self.__matrix_data[row_num].pop(row_col_num)
+        # The rows after row_col_num are moved up one and then the columns after it are moved left one, in place, so no
+        # new arrays have to be made; the last row and column then become spare capacity
+        size = self.__size
+        self.__matrix_data[row_col_num:size - 1, :size] = self.__matrix_data[row_col_num + 1:size, :size]
+        self.__matrix_data[:size - 1, row_col_num:size - 1] = self.__matrix_data[:size - 1, row_col_num + 1:size]
+        self.__size -= 1
+
+    def truncate(self, size):
+        # Removes every row and column from size onwards; as they are at the end, nothing has to be moved and they just
+        # become spare capacity (which expand overwrites before it is used again)
+        self.__size = size
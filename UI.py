@@ -3,9 +3,9 @@ from tkinter import (Tk, Toplevel, Canvas, Button, Label, Scale, Checkbutton, SU
                      BooleanVar, filedialog)
 from tkinter.ttk import Progressbar, Separator
 from collections import namedtuple
+from functools import lru_cache
 from abc import ABC, abstractmethod
-from copy import deepcopy
-from numpy import array, linalg, dot
+from numpy import array, arange, polyval, stack, insert, concatenate, flatnonzero, float64
 
 from Vector2D import Vec2D
 from Floor import Floor
@@ -23,6 +23,8 @@ class Manager:
     # If the canvas is made the maximum possible size, the outer vertices are hidden by the edges of the canvas, so
     # every widget must be scaled appropriately
     CANVAS_SCALE = 0.9
+    # Milliseconds to wait after the last <Configure> event before resizing
+    RESIZE_DELAY = 50
     # Tool constants
     NONE = "N"
     CREATE_WALL = "W"
@@ -42,6 +44,10 @@ class Manager:
     NAV_GRAPH_TWEAKING = 3
     PATHFINDING = 4
     RETURN = 5
+    # The tools the 3, 4 and 5 number keys select in each stage (the buttons in these positions change between stages)
+    STAGE_TOOL_KEYS = {MAP_CREATION: {51: CREATE_WALL, 52: CREATE_LINK, 53: DELETE},
+                       NAV_GRAPH_TWEAKING: {51: EDIT_WEIGHT, 52: CHANGE_DIRECTION, 53: BLOCK_PATH},
+                       PATHFINDING: {51: PLACE_START, 52: PLACE_GOAL, 53: FIND_PATH}}
     # Options constants
     DISABLE_WARNINGS = "Disable\nWarnings"
     PRIMARY_ALGORITHM = "Primary\nAlgorithm"
@@ -60,12 +66,27 @@ class Manager:
                        ENABLE_GRID: False, GRID_SIZE_X: 15, GRID_SIZE_Y: 9, PRECOMPUTE_LINK_DIST: False,
                        THREAD_TARGET: 8, LINK_WEIGHT: 1.0, SMOOTH_FINAL_PATH: False}
     # Canvas widget objects
+    # Each widget keeps the ids of the canvas items it drew, so when the canvas is resized the items can just be moved
+    # and rescaled with coords and itemconfigure rather than being deleted and created again
     # ABC is the Abstract Base Class that all abstract base classes must inherit
     class AbstractCanvasWidget(ABC):
 
         @abstractmethod
         def draw_scaled(self, master, canvas):
             # Abstract method that must be overridden for each widget
+            # Draws the widget the first time it is called, and updates the items already drawn after that
+            pass
+
+        @property
+        @abstractmethod
+        def drawn_from(self):
+            # Everything the widget is drawn from, so if a widget is added that would look exactly the same as one
+            # already drawn, the one already drawn can be kept instead
+            pass
+
+        @abstractmethod
+        def delete(self, canvas):
+            # Deletes the items the widget drew
             pass
 
     class LineCanvasWidget(AbstractCanvasWidget):
@@ -75,16 +96,57 @@ class Manager:
             self.__width = width
             self.__dash = dash
             self.__arrow = arrow
+            self.__item_id = None
+
+        @property
+        def drawn_from(self):
+            return (self.__point1.x, self.__point1.y, self.__point2.x, self.__point2.y, self.__width, self.__dash,
+                    self.__arrow)
+
+        def delete(self, canvas):
+            canvas.delete(self.__item_id)
 
         def draw_scaled(self, master, canvas):
-            canvas_point1 = master.map_to_canvas_space(self.__point1)
-            canvas_point2 = master.map_to_canvas_space(self.__point2)
+            canvas_x1, canvas_y1 = master.map_to_canvas_space_xy(self.__point1)
+            canvas_x2, canvas_y2 = master.map_to_canvas_space_xy(self.__point2)
             # Multiply by root canvas area to keep fraction of canvas area covered by line constant
             # Minimum of width * 200 is to keep the line from having <1 width at low resolutions, and to make sure
             # thicker always stay appear noticeably thicker
             canvas_width = max(self.__width * master.min_canvas_scale, self.__width*500)
-            canvas.create_line(canvas_point1.x, canvas_point1.y, canvas_point2.x, canvas_point2.y,
-                               width=canvas_width, dash=self.__dash, arrow=self.__arrow)
+            if self.__item_id is None:
+                self.__item_id = canvas.create_line(canvas_x1, canvas_y1, canvas_x2, canvas_y2, width=canvas_width,
+                                                    dash=self.__dash, arrow=self.__arrow)
+            else:
+                canvas.coords(self.__item_id, canvas_x1, canvas_y1, canvas_x2, canvas_y2)
+                canvas.itemconfigure(self.__item_id, width=canvas_width)
+
+    class PolylineCanvasWidget(AbstractCanvasWidget):
+        # Line through an (n, 2) array of points, drawn as one canvas item rather than a separate line for each segment
+        def __init__(self, points, width, dash, arrow):
+            self.__points = points
+            self.__width = width
+            self.__dash = dash
+            self.__arrow = arrow
+            self.__item_id = None
+
+        @property
+        def drawn_from(self):
+            # The array itself cannot be compared, so its bytes are used instead
+            return self.__points.tobytes(), self.__width, self.__dash, self.__arrow
+
+        def delete(self, canvas):
+            canvas.delete(self.__item_id)
+
+        def draw_scaled(self, master, canvas):
+            canvas_coords = master.map_array_to_canvas_space(self.__points).ravel().tolist()
+            # Same width scaling as LineCanvasWidget
+            canvas_width = max(self.__width * master.min_canvas_scale, self.__width*500)
+            if self.__item_id is None:
+                self.__item_id = canvas.create_line(*canvas_coords, width=canvas_width, dash=self.__dash,
+                                                    arrow=self.__arrow)
+            else:
+                canvas.coords(self.__item_id, *canvas_coords)
+                canvas.itemconfigure(self.__item_id, width=canvas_width)
 
     class CircleCanvasWidget(AbstractCanvasWidget):
         def __init__(self, position, radius, fill_colour, border_width):
@@ -92,14 +154,26 @@ class Manager:
             self.__radius = radius
             self.__fill_colour = fill_colour
             self.__border_width = border_width
+            self.__item_id = None
+
+        @property
+        def drawn_from(self):
+            return self.__position.x, self.__position.y, self.__radius, self.__fill_colour, self.__border_width
+
+        def delete(self, canvas):
+            canvas.delete(self.__item_id)
 
         def draw_scaled(self, master, canvas):
-            canvas_position = master.map_to_canvas_space(self.__position)
+            # Plain floats are used rather than Vec2Ds for the corners as there can be a lot of circles
+            canvas_x, canvas_y = master.map_to_canvas_space_xy(self.__position)
             canvas_radius = self.__radius * master.min_canvas_scale
-            canvas_top_left = Vec2D.add(canvas_position, Vec2D(canvas_radius, canvas_radius))
-            canvas_bottom_right = Vec2D.sub(canvas_position, Vec2D(canvas_radius, canvas_radius))
-            canvas.create_oval(canvas_top_left.x, canvas_top_left.y, canvas_bottom_right.x, canvas_bottom_right.y,
-                               fill=self.__fill_colour, width=self.__border_width)
+            if self.__item_id is None:
+                self.__item_id = canvas.create_oval(canvas_x + canvas_radius, canvas_y + canvas_radius,
+                                                    canvas_x - canvas_radius, canvas_y - canvas_radius,
+                                                    fill=self.__fill_colour, width=self.__border_width)
+            else:
+                canvas.coords(self.__item_id, canvas_x + canvas_radius, canvas_y + canvas_radius,
+                              canvas_x - canvas_radius, canvas_y - canvas_radius)
 
     class TextCanvasWidget(AbstractCanvasWidget):
         def __init__(self, position, text, font, size):
@@ -107,14 +181,29 @@ class Manager:
             self.__text = text
             self.__font = font
             self.__size = size
+            self.__text_id = None
+            self.__background_id = None
+
+        @property
+        def drawn_from(self):
+            return self.__position.x, self.__position.y, self.__text, self.__font, self.__size
+
+        def delete(self, canvas):
+            canvas.delete(self.__text_id, self.__background_id)
 
         def draw_scaled(self, master, canvas):
-            canvas_position = master.map_to_canvas_space(self.__position)
-            text_ref = canvas.create_text(canvas_position.x, canvas_position.y, text=self.__text, font=self.__font %
-                                          int(1 + self.__size * master.min_canvas_scale))
-            x1, y1, x2, y2 = canvas.bbox(text_ref)
-            canvas.create_rectangle(x1, y1, x2, y2, fill="#F0F0F0")
-            canvas.tag_raise(text_ref)
+            canvas_x, canvas_y = master.map_to_canvas_space_xy(self.__position)
+            canvas_font = self.__font % int(1 + self.__size * master.min_canvas_scale)
+            if self.__text_id is None:
+                self.__text_id = canvas.create_text(canvas_x, canvas_y, text=self.__text, font=canvas_font)
+                x1, y1, x2, y2 = canvas.bbox(self.__text_id)
+                self.__background_id = canvas.create_rectangle(x1, y1, x2, y2, fill="#F0F0F0")
+                canvas.tag_raise(self.__text_id)
+            else:
+                canvas.coords(self.__text_id, canvas_x, canvas_y)
+                canvas.itemconfigure(self.__text_id, font=canvas_font)
+                # The background has to fit the text at its new size
+                canvas.coords(self.__background_id, *canvas.bbox(self.__text_id))
 
     def __init__(self):
         self.__window = Tk()
@@ -124,7 +213,26 @@ class Manager:
         self.__window.bind("<Configure>", self.__resize)
         self.__widget_refs = dict()
         self.__widget_fonts = dict()
+        # The font size each widget was last given, so widgets are only reconfigured when their size actually changes
+        self.__widget_font_sizes = dict()
+        # Where each widget is placed, so it can be placed again after being hidden
+        self.__widget_places = dict()
+        # Creating Tk widgets is slow, so rather than destroying them when the stage changes, they are hidden and kept
+        # here (by the stage they are for) to be shown again the next time that stage is entered
+        self.__stage_widgets = dict()
+        # The stage the current widgets are for, and whether they were shown again rather than just created
+        self.__widgets_stage = None
+        self.__widgets_reused = False
+        self.__pending_resize = None
         self.__canvas = None
+        self.__canvas_border = None
+        # Weights are often the same as each other and the same weights are shown every redraw, so the text for each
+        # weight is kept rather than rounded and converted again
+        self.__weight_labels = dict()
+        # The points on each smoothed part of the current path, by floor number and then control vertex positions
+        self.__spline_points = dict()
+        # Everything the canvas was last drawn from (see __canvas_state)
+        self.__canvas_state_drawn = None
         self.__active_tool = self.NONE
         self.__prev_click_pos = None
         self.__shift_held = False
@@ -134,13 +242,23 @@ class Manager:
         self.__start_pos = None
         self.__goal_pos = None
         self.__path = None
+        # What the rest of the number keys do, which is the same in every stage
+        # 0 is the furthest to the right on the keyboard, but has a lower key code
+        # Alt key - generally in apps pressing alt should show what keys to press for hot keys, here it will display a
+        # pop-up to explaining the 1-0 keys can be used.
+        self.__key_actions = {49: self.save, 50: self.open_options, 54: lambda: self.change_floor(-1),
+                              55: lambda: self.change_floor(1), 56: self.help, 57: self.prev_stage, 48: self.next_stage,
+                              18: lambda: self.info("You can use the number keys (1-0) as shortcut buttons to activate "
+                                                    "any of the buttons at the top of the screen.")}
         self.__window.bind("<KeyPress>", self.key_down)
         self.__window.bind("<KeyRelease>", self.key_up)
         self.__current_stage = self.MAIN_MENU
         self.__current_floor_num = 0
         self.__map = Map()
         self.__canvas_widget_data = []
-        self.__options = deepcopy(self.DEFAULT_OPTIONS)
+        # The widgets drawn the last time the canvas was drawn, while it is being redrawn
+        self.__old_canvas_widget_data = []
+        self.__options = self.DEFAULT_OPTIONS.copy()
         self.__new_options = None
         self.main_menu_ui()
         self.__window.mainloop()
@@ -162,36 +280,73 @@ class Manager:
         # Updating resolution must also update min_scale
         # Pre-computing min_scale here avoids recalculating it every time a new widget is added
         self.__resolution = value
-        font_scales = Vec2D.component_wise_div(self.resolution, self.FONT_REFERENCE_RES)
-        self.min_font_scale = min(font_scales.x, font_scales.y)
-        canvas_scales = Vec2D.component_wise_div(Vec2D(self.resolution.x, self.resolution.y * 6 / 7),
-                                                 GlobalConstants.FLOOR_RATIO)
-        self.min_canvas_scale = min(canvas_scales.x, canvas_scales.y)
+        # The scales are worked out with plain floats rather than Vec2Ds
+        canvas_height = value.y * 6 / 7
+        self.min_font_scale = min(value.x / self.FONT_REFERENCE_RES.x, value.y / self.FONT_REFERENCE_RES.y)
+        self.min_canvas_scale = min(value.x / GlobalConstants.FLOOR_RATIO.x, canvas_height /
+                                    GlobalConstants.FLOOR_RATIO.y)
+        # The scale and offset used to map positions to canvas space only change with the resolution, so they are
+        # calculated here rather than every time a position is mapped
+        self.__canvas_space_scale = self.min_canvas_scale * self.CANVAS_SCALE
+        self.__canvas_space_offset = Vec2D((value.x - GlobalConstants.FLOOR_RATIO.x * self.__canvas_space_scale) / 2,
+                                           (canvas_height - GlobalConstants.FLOOR_RATIO.y * self.__canvas_space_scale)
+                                           / 2)
 
     def add_canvas_line(self, point1, point2, width=0.002, dash=(), arrow="none"):
-        self.__canvas_widget_data.append(self.LineCanvasWidget(point1, point2, width, dash, arrow))
-        self.__canvas_widget_data[-1].draw_scaled(self, self.__canvas)
+        self.__add_canvas_widget(self.LineCanvasWidget(point1, point2, width, dash, arrow))
+
+    def add_canvas_polyline(self, points, width=0.002, dash=(), arrow="none"):
+        self.__add_canvas_widget(self.PolylineCanvasWidget(points, width, dash, arrow))
 
     def add_canvas_circle(self, position, radius=0.015, fill_colour="", border_width=1):
-        self.__canvas_widget_data.append(self.CircleCanvasWidget(position, radius, fill_colour, border_width))
-        self.__canvas_widget_data[-1].draw_scaled(self, self.__canvas)
+        self.__add_canvas_widget(self.CircleCanvasWidget(position, radius, fill_colour, border_width))
 
     def add_canvas_text(self, position, text, font="TkDefaultFont %s", size=0.015):
         # Note that text size is much smaller here than for the main UI buttons as it is scaled based of
         # min_canvas_scale
-        self.__canvas_widget_data.append(self.TextCanvasWidget(position, text, font, size))
-        self.__canvas_widget_data[-1].draw_scaled(self, self.__canvas)
+        self.__add_canvas_widget(self.TextCanvasWidget(position, text, font, size))
+
+    def __add_canvas_widget(self, widget):
+        # While the canvas is being redrawn, widgets are compared in order with the ones drawn last time, and for as
+        # long as they match, the old widgets (and their canvas items) are kept rather than being deleted and drawn
+        # again. From the first one that is different, the rest of the old widgets are deleted and the new ones are
+        # drawn, which keeps every item stacked in the order it was added
+        widget_num = len(self.__canvas_widget_data)
+        if widget_num < len(self.__old_canvas_widget_data):
+            old_widget = self.__old_canvas_widget_data[widget_num]
+            if type(old_widget) is type(widget) and old_widget.drawn_from == widget.drawn_from:
+                self.__canvas_widget_data.append(old_widget)
+                return
+            for old_widget in self.__old_canvas_widget_data[widget_num:]:
+                old_widget.delete(self.__canvas)
+            del self.__old_canvas_widget_data[widget_num:]
+        self.__canvas_widget_data.append(widget)
+        widget.draw_scaled(self, self.__canvas)
 
     def __add_widget(self, widget_name, widget_obj, x_pos, y_pos, width, height, font, font_size):
         self.__widget_refs[widget_name] = widget_obj
-        self.__widget_refs[widget_name].place(anchor="center", relx=x_pos, rely=y_pos, relwidth=width, relheight=height)
+        self.__widget_places[widget_name] = (x_pos, y_pos, width, height)
+        widget_obj.place(anchor="center", relx=x_pos, rely=y_pos, relwidth=width, relheight=height)
         self.__widget_fonts[widget_name] = self.FontTuple(font, font_size)
+        self.__widget_font_sizes.pop(widget_name, None)
         self.__scale_widget(widget_name)
 
     def __resize(self, _):
+        # <Configure> fires many times while the window is being dragged to a new size (and for every widget inside
+        # the window too), so the resize is only done once no more events have come for RESIZE_DELAY milliseconds
+        if self.__pending_resize is not None:
+            self.__window.after_cancel(self.__pending_resize)
+        self.__pending_resize = self.__window.after(self.RESIZE_DELAY, self.__do_resize)
+
+    def __do_resize(self):
+        self.__pending_resize = None
+        new_resolution = Vec2D(self.__window.winfo_width(), self.__window.winfo_height())
+        if new_resolution.x == self.resolution.x and new_resolution.y == self.resolution.y:
+            # Nothing needs redrawing
+            return
         # Updates window resolution
-        self.resolution = Vec2D(self.__window.winfo_width(), self.__window.winfo_height())
-        for widget_name in self.__widget_refs.keys():
+        self.resolution = new_resolution
+        for widget_name in self.__widget_refs:
             # Scales text size of all widgets
             self.__scale_widget(widget_name)
         if self.__canvas is not None:
@@ -201,24 +356,56 @@ class Manager:
             self.refresh_canvas()
 
     def __scale_widget(self, widget_name):
+        widget_font = self.__widget_fonts[widget_name]
+        if widget_font.font is None:
+            # Widget does not have text (e.g. the progress bar)
+            return
         # Minimum font size of 1
-        if not widget_name == "ProgressBar":
-            self.__widget_refs[widget_name].configure(font=self.__widget_fonts[widget_name].font %
-                                                      int(1 + self.__widget_fonts[widget_name].size *
-                                                          self.min_font_scale))
-        # Progress bar does not have text
-
-    def __destroy_widgets(self):
-        for widget_name in self.__widget_refs.keys():
-            self.__widget_refs[widget_name].destroy()
-        self.__widget_fonts.clear()
-        self.__widget_refs.clear()
+        font_size = int(1 + widget_font.size * self.min_font_scale)
+        if self.__widget_font_sizes.get(widget_name) != font_size:
+            self.__widget_font_sizes[widget_name] = font_size
+            self.__widget_refs[widget_name].configure(font=widget_font.font % font_size)
+
+    def __hide_widgets(self):
+        # Hides the current widgets and keeps them for the next time their stage is shown
+        for widget in self.__widget_refs.values():
+            widget.place_forget()
+        if self.__widgets_stage is not None:
+            self.__stage_widgets[self.__widgets_stage] = (self.__widget_refs, self.__widget_fonts,
+                                                          self.__widget_font_sizes, self.__widget_places)
+        self.__widget_refs = dict()
+        self.__widget_fonts = dict()
+        self.__widget_font_sizes = dict()
+        self.__widget_places = dict()
+        self.__widgets_stage = None
+
+    def __show_stage_widgets(self, stage):
+        # Shows the widgets kept from the last time stage was shown, if there are any, and returns whether there were
+        # If not, the widgets added next are kept for stage instead
+        self.__widgets_stage = stage
+        self.__widgets_reused = stage in self.__stage_widgets
+        if self.__widgets_reused:
+            (self.__widget_refs, self.__widget_fonts, self.__widget_font_sizes,
+             self.__widget_places) = self.__stage_widgets.pop(stage)
+            for widget_name, widget in self.__widget_refs.items():
+                x_pos, y_pos, width, height = self.__widget_places[widget_name]
+                widget.place(anchor="center", relx=x_pos, rely=y_pos, relwidth=width, relheight=height)
+                # The window could have been resized while the widget was hidden
+                self.__scale_widget(widget_name)
+            # No tool is selected when a stage is entered
+            for tool in self.STAGE_TOOL_KEYS.get(stage, dict()).values():
+                self.__widget_refs[tool].configure(relief=RAISED, bg="light grey")
+            if "FloorCounter" in self.__widget_refs:
+                self.__widget_refs["FloorCounter"].configure(text="Floor\n"+str(self.__current_floor_num+1))
+        return self.__widgets_reused
 
     def main_menu_ui(self):
         if self.__new_options is not None:
             self.__options = self.__new_options
             self.__new_options = None
             self.info("Setting changes applied!")
+        if self.__show_stage_widgets(self.MAIN_MENU):
+            return
         self.__add_widget("NewMapButton", Button(self.__window, text="New Map", command=self.new_map,
                                                  bg="light grey"),
                           0.5, 5 / 14, 0.25, 1 / 6, "TkDefaultFont %s", 16)
@@ -240,11 +427,11 @@ class Manager:
         if file1_obj is None:
             return
         else:
-            self.__map = Map(data=file1_obj.read().split("\n"))
+            self.__map = Map(data=file1_obj)
             self.next_stage()
             if file2_obj is not None:
                 self.next_stage()
-                self.__map.load_nav_graph_edits(file2_obj.read().split("\n"))
+                self.__map.load_nav_graph_edits(file2_obj)
                 file2_obj.close()
             file1_obj.close()
             self.update_canvas()
@@ -254,6 +441,8 @@ class Manager:
             self.__options = self.__new_options
             self.__new_options = None
             self.info("Setting changes applied!")
+        if self.__show_stage_widgets(self.MAP_CREATION):
+            return
         self.__add_widget(self.CREATE_WALL, Button(self.__window, text="Create\nWall", command=lambda:
                                                    self.__set_tool(self.CREATE_WALL), bg="light grey"),
                           31 / 128, 3 / 42, 5 / 64, 5 / 42, "TkDefaultFont %s", 12)
@@ -265,11 +454,15 @@ class Manager:
                           53 / 128, 3 / 42, 5 / 64, 5 / 42, "TkDefaultFont %s", 12)
 
     def nav_mesh_generation_ui(self):
+        if self.__show_stage_widgets(self.NAV_MESH_GENERATION):
+            self.__widget_refs["ProgressBar"]["value"] = 0
+            return
         self.__add_widget("CancelButton", Button(self.__window, text="Cancel", command=self.cancel,
                                                  bg="light grey"),
                           122 / 128, 3 / 42, 5 / 64, 5 / 42, "TkDefaultFont %s", 12)
+        # Progress bar does not have text, so it has no font
         self.__add_widget("ProgressBar", Progressbar(self.__window, maximum=1.0, mode="determinate"),
-                          1 / 2, 3 / 42, 3 / 8, 5 / 42, "TkDefaultFont %s", 12)
+                          1 / 2, 3 / 42, 3 / 8, 5 / 42, None, 12)
 
     def nav_mesh_generation_update_prog(self, complete):
         # Updates progress bar based on fraction complete and returns if nav mesh generation has been cancelled
@@ -281,6 +474,8 @@ class Manager:
             return True
 
     def nav_graph_tweaking_ui(self):
+        if self.__show_stage_widgets(self.NAV_GRAPH_TWEAKING):
+            return
         self.__add_widget(self.EDIT_WEIGHT, Button(self.__window, text="Edit\nWeight", command=lambda:
                                                    self.__set_tool(self.EDIT_WEIGHT), bg="light grey"),
                           31 / 128, 3 / 42, 5 / 64, 5 / 42, "TkDefaultFont %s", 12)
@@ -292,6 +487,8 @@ class Manager:
                           53 / 128, 3 / 42, 5 / 64, 5 / 42, "TkDefaultFont %s", 12)
 
     def pathfinding_ui(self):
+        if self.__show_stage_widgets(self.PATHFINDING):
+            return
         self.__add_widget(self.PLACE_START, Button(self.__window, text="Place\nStart", command=lambda:
                                                    self.__set_tool(self.PLACE_START), bg="light grey"),
                           31 / 128, 3 / 42, 5 / 64, 5 / 42, "TkDefaultFont %s", 12)
@@ -304,6 +501,9 @@ class Manager:
 
     def __place_standard_buttons(self):
         # Places the standard buttons used in each stage
+        if self.__widgets_reused:
+            # They were kept with the rest of the stage's widgets
+            return
         self.__add_widget("SaveButton", Button(self.__window, text="Save", command=self.save, bg="light grey"),
                           3 / 64, 3 / 42, 5 / 64, 5 / 42, "TkDefaultFont %s", 12)
         self.__add_widget("OptionsButton", Button(self.__window, text="Options", command=self.open_options,
@@ -342,7 +542,7 @@ class Manager:
         self.__current_stage -= 1
         # Resets floor to floor 0
         self.__current_floor_num = 0
-        self.__destroy_widgets()
+        self.__hide_widgets()
         self.__active_tool = self.NONE
         if self.__current_stage == self.MAIN_MENU:
             self.__canvas.destroy()
@@ -367,7 +567,7 @@ class Manager:
         self.__current_stage += 1
         # Resets floor to floor 0
         self.__current_floor_num = 0
-        self.__destroy_widgets()
+        self.__hide_widgets()
         self.__active_tool = self.NONE
         if self.__current_stage >= self.RETURN:
             self.__current_stage = self.MAIN_MENU
@@ -377,7 +577,12 @@ class Manager:
         elif self.__current_stage == self.MAP_CREATION:
             self.map_creation_ui()
             # Create canvas
-            self.__canvas = Canvas(self.__window)
+            # It is given its size straight away, as resizing does nothing unless the window has changed size
+            self.__canvas = Canvas(self.__window, width=self.resolution.x, height=self.resolution.y * 6 / 7)
+            self.__canvas_state_drawn = None
+            # Nothing from the last canvas can be kept
+            self.__canvas_widget_data = []
+            self.__canvas_border = self.__canvas.create_line(0, 0, self.resolution.x, 0, width=5)
             self.__canvas.bind("<Button-1>", self.canvas_click)
             self.__canvas.place(anchor="center", relx=0.5, rely=4 / 7)
         elif self.__current_stage == self.NAV_MESH_GENERATION:
@@ -390,7 +595,8 @@ class Manager:
         elif self.__current_stage == self.PATHFINDING:
             self.__map.join_links(self.__options[self.PRECOMPUTE_LINK_DIST],
                                   self.__options[self.PRIMARY_ALGORITHM],
-                                  self.__options[self.LINK_WEIGHT]/10)
+                                  self.__options[self.LINK_WEIGHT]/10,
+                                  self.__options[self.LINK_ALGORITHM])
             self.pathfinding_ui()
             self.__start_pos = None
             self.__goal_pos = None
@@ -410,48 +616,13 @@ class Manager:
             # Program must store whether shift is currently held to alter wall placement behaviour
             self.__shift_held = True
         elif self.__current_stage not in (self.MAIN_MENU, self.NAV_MESH_GENERATION):
-            if event.keycode == 49:
-                # Number keys can be used instead of clicking buttons - 49 is number 1
-                self.save()
-            elif event.keycode == 50:
-                self.open_options()
-            elif event.keycode == 51:
-                if self.__current_stage == self.MAP_CREATION:
-                    self.__set_tool(self.CREATE_WALL)
-                elif self.__current_stage == self.NAV_GRAPH_TWEAKING:
-                    self.__set_tool(self.EDIT_WEIGHT)
-                elif self.__current_stage == self.PATHFINDING:
-                    self.__set_tool(self.PLACE_START)
-            elif event.keycode == 52:
-                if self.__current_stage == self.MAP_CREATION:
-                    self.__set_tool(self.CREATE_LINK)
-                elif self.__current_stage == self.NAV_GRAPH_TWEAKING:
-                    self.__set_tool(self.CHANGE_DIRECTION)
-                elif self.__current_stage == self.PATHFINDING:
-                    self.__set_tool(self.PLACE_GOAL)
-            elif event.keycode == 53:
-                if self.__current_stage == self.MAP_CREATION:
-                    self.__set_tool(self.DELETE)
-                elif self.__current_stage == self.NAV_GRAPH_TWEAKING:
-                    self.__set_tool(self.BLOCK_PATH)
-                elif self.__current_stage == self.PATHFINDING:
-                    self.__set_tool(self.FIND_PATH)
-            elif event.keycode == 54:
-                self.change_floor(-1)
-            elif event.keycode == 55:
-                self.change_floor(1)
-            elif event.keycode == 56:
-                self.help()
-            elif event.keycode == 57:
-                self.prev_stage()
-            elif event.keycode == 48:
-                # 0 is the furthest to the right on the keyboard, but has a lower key code
-                self.next_stage()
-            elif event.keycode == 18:
-                # Alt key - generally in apps pressing alt should show what keys to press for hot keys, here it will
-                # display a pop-up to explaining the 1-0 keys can be used.
-                self.info("You can use the number keys (1-0) as shortcut buttons to activate any of the buttons at the "
-                          "top of the screen.")
+            # Number keys can be used instead of clicking buttons - 49 is number 1
+            # The keys are looked up in dictionaries rather than checking each one in turn
+            stage_tool_keys = self.STAGE_TOOL_KEYS[self.__current_stage]
+            if event.keycode in stage_tool_keys:
+                self.__set_tool(stage_tool_keys[event.keycode])
+            elif event.keycode in self.__key_actions:
+                self.__key_actions[event.keycode]()
 
     def key_up(self, event):
         if event.keycode == 16:
@@ -464,28 +635,39 @@ class Manager:
             self.update_canvas()
 
     def update_canvas(self):
+        # update_canvas is called after every click and tool change, even when nothing ends up being changed, so if
+        # nothing that is drawn has changed since the last time, the canvas is left as it is (resizing is handled
+        # separately by refresh_canvas)
+        if self.__canvas_state() == self.__canvas_state_drawn:
+            return
+        # Every widget is drawn as it is added, so the old widgets are set aside first rather than redrawn at the end
+        self.__old_canvas_widget_data = self.__canvas_widget_data
         self.__canvas_widget_data = []
         if self.__current_stage >= self.MAP_CREATION:
             if self.__options[self.ENABLE_GRID] and self.__current_stage == self.MAP_CREATION:
+                # The grid points are spaced evenly across the floor, so they are found with plain multiplication
+                # rather than bilinearly interpolating between the corners
+                grid_spacing_x = GlobalConstants.FLOOR_RATIO.x / (self.__options[self.GRID_SIZE_X] - 1)
+                grid_spacing_y = GlobalConstants.FLOOR_RATIO.y / (self.__options[self.GRID_SIZE_Y] - 1)
                 for x in range(self.__options[self.GRID_SIZE_X]):
                     for y in range(self.__options[self.GRID_SIZE_Y]):
-                        self.add_canvas_circle(Vec2D.bi_lerp(Vec2D(0, 0), Vec2D(GlobalConstants.FLOOR_RATIO.x, 0),
-                                               Vec2D(0, GlobalConstants.FLOOR_RATIO.y),
-                                               Vec2D(GlobalConstants.FLOOR_RATIO.x,
-                                               GlobalConstants.FLOOR_RATIO.y),
-                                               x/(self.__options[self.GRID_SIZE_X] - 1),
-                                               y/(self.__options[self.GRID_SIZE_Y] - 1)), fill_colour="black",
+                        self.add_canvas_circle(Vec2D(x * grid_spacing_x, y * grid_spacing_y), fill_colour="black",
                                                radius=0.01)
-            vertex_positions = self.__current_floor.walls.vertex_positions
-            for vert1_id in range(self.__current_floor.walls.vertices):
-                for vert2_id in range(vert1_id, self.__current_floor.walls.vertices):
+            walls = self.__current_floor.walls
+            vertex_positions = walls.vertex_positions
+            for vert1_id in range(walls.vertices):
+                # Only the edges that exist are gone through rather than every other vertex
+                for vert2_id, edge_val in walls.get_edge_vals_from(vert1_id):
+                    if vert2_id < vert1_id:
+                        continue
                     if self.__current_stage == self.MAP_CREATION:
-                        if self.__current_floor.walls.get_edge_val(vert1_id, vert2_id) == 1:
+                        if edge_val == 1:
                             self.add_canvas_line(vertex_positions[vert1_id], vertex_positions[vert2_id])
-                        elif self.__current_floor.walls.get_edge_val(vert1_id, vert2_id) == 2:
+                        elif edge_val == 2:
                             self.add_canvas_line(vertex_positions[vert1_id], vertex_positions[vert2_id], width=0.004)
                     else:
-                        if self.__current_floor.walls.get_edge(vert1_id, vert2_id):
+                        # Like get_edge, negative values are not edges
+                        if edge_val > 0:
                             self.add_canvas_line(vertex_positions[vert1_id], vertex_positions[vert2_id], width=0.004)
                 if self.__current_stage == self.MAP_CREATION:
                     self.add_canvas_circle(vertex_positions[vert1_id], fill_colour="white")
@@ -493,40 +675,41 @@ class Manager:
                 self.add_canvas_circle(link.position, fill_colour="blue")
                 self.add_canvas_text(Vec2D.sub(link.position, Vec2D(0, 0.04)), link.link_id)
         if self.__current_stage == self.NAV_GRAPH_TWEAKING:
-            vertex_positions = self.__current_nav_mesh.nav_graph.vertex_positions
-            for vert1_id in range(self.__current_nav_mesh.nav_graph.vertices):
-                for vert2_id in range(vert1_id):
-                    # Still need to display -1 edges
-                    if self.__current_nav_mesh.nav_graph.get_edge_val(vert1_id, vert2_id) != 0:
-                        weight1 = self.__current_nav_mesh.nav_graph.get_edge_val(vert1_id, vert2_id)
-                        weight2 = self.__current_nav_mesh.nav_graph.get_edge_val(vert2_id, vert1_id)
-                        if weight1 != -1:
-                            if weight2 != -1:
-                                # Edge is bi-directional
-                                self.add_canvas_line(vertex_positions[vert1_id], vertex_positions[vert2_id],
-                                                     dash=(2,), arrow=BOTH)
-                            else:
-                                # Edge is uni-directional from vert 1 to vert 2
-                                self.add_canvas_line(vertex_positions[vert1_id], vertex_positions[vert2_id],
-                                                     dash=(2,), arrow=FIRST)
-                            display_weight = str(round(weight1 * 10, 2))
-                            text_pos = Vec2D.add(vertex_positions[vert1_id],
-                                                 vertex_positions[vert2_id]).scalar_multiply(1 / 2)
-                            self.add_canvas_text(text_pos, display_weight)
-                        else:
-                            if weight2 != -1:
-                                # Edge is uni-directional from vert 2 to vert 1
-                                self.add_canvas_line(vertex_positions[vert1_id], vertex_positions[vert2_id],
-                                                     dash=(2,), arrow=LAST)
-                                display_weight = str(round(weight2 * 10, 2))
-                            else:
-                                # Edge is blocked
-                                self.add_canvas_line(vertex_positions[vert1_id], vertex_positions[vert2_id],
-                                                     dash=(2,))
-                                display_weight = "∞"
-                            text_pos = Vec2D.add(vertex_positions[vert1_id],
-                                                 vertex_positions[vert2_id]).scalar_multiply(1 / 2)
-                            self.add_canvas_text(text_pos, display_weight)
+            nav_graph = self.__current_nav_mesh.nav_graph
+            vertex_positions = nav_graph.vertex_positions
+            # Still need to display -1 edges, so blocked edges are included; like looping over every vert2 < vert1, each
+            # pair of vertices only comes up once
+            vert1_ids, vert2_ids = nav_graph.get_edge_arrays(include_blocked=True)
+            # The weights are displayed halfway along the edges, so the midpoints of every edge are found at once with
+            # NumPy
+            positions = nav_graph.positions
+            midpoints = ((positions[vert1_ids] + positions[vert2_ids]) * 0.5).tolist()
+            for vert1_id, vert2_id, (text_x, text_y) in zip(vert1_ids.tolist(), vert2_ids.tolist(), midpoints):
+                weight1 = nav_graph.get_edge_val(vert1_id, vert2_id)
+                weight2 = nav_graph.get_edge_val(vert2_id, vert1_id)
+                if weight1 != -1:
+                    if weight2 != -1:
+                        # Edge is bi-directional
+                        self.add_canvas_line(vertex_positions[vert1_id], vertex_positions[vert2_id],
+                                             dash=(2,), arrow=BOTH)
+                    else:
+                        # Edge is uni-directional from vert 1 to vert 2
+                        self.add_canvas_line(vertex_positions[vert1_id], vertex_positions[vert2_id],
+                                             dash=(2,), arrow=FIRST)
+                    display_weight = self.__weight_label(weight1)
+                    self.add_canvas_text(Vec2D(text_x, text_y), display_weight)
+                else:
+                    if weight2 != -1:
+                        # Edge is uni-directional from vert 2 to vert 1
+                        self.add_canvas_line(vertex_positions[vert1_id], vertex_positions[vert2_id],
+                                             dash=(2,), arrow=LAST)
+                        display_weight = self.__weight_label(weight2)
+                    else:
+                        # Edge is blocked
+                        self.add_canvas_line(vertex_positions[vert1_id], vertex_positions[vert2_id],
+                                             dash=(2,))
+                        display_weight = "∞"
+                    self.add_canvas_text(Vec2D(text_x, text_y), display_weight)
         elif self.__current_stage == self.PATHFINDING:
             if self.__start_floor_num == self.__current_floor_num:
                 if self.__start_pos is not None:
@@ -541,10 +724,8 @@ class Manager:
                     if floor_num == self.__current_floor_num:
                         path_to_display = self.__path[edge_floor_tuple]
                         if self.__options[self.SMOOTH_FINAL_PATH]:
-                            control_verts = []
-                            for vert_id in path_to_display:
-                                control_verts.append(vertex_positions[vert_id])
-                            self.__draw_cubic_spline(control_verts)
+                            # The positions of every vertex on the path are taken at once as an (n, 2) array
+                            self.__draw_cubic_spline(self.__current_nav_mesh.nav_graph.positions[path_to_display])
                         else:
                             for path_num in range(len(path_to_display) - 1):
                                 vert1_id = path_to_display[path_num]
@@ -557,105 +738,126 @@ class Manager:
                 self.add_canvas_circle(self.__prev_click_pos, border_width=2, fill_colour="white")
             else:
                 self.add_canvas_circle(self.__prev_click_pos, border_width=2)
-        self.refresh_canvas()
+        # Any old widgets left over were not drawn this time
+        for old_widget in self.__old_canvas_widget_data[len(self.__canvas_widget_data):]:
+            old_widget.delete(self.__canvas)
+        self.__old_canvas_widget_data = []
+        # The state is found after drawing, so it is from exactly what was drawn
+        self.__canvas_state_drawn = self.__canvas_state()
+
+    def __canvas_state(self):
+        # Returns a tuple of everything update_canvas draws from. Objects are put in the tuple themselves rather than
+        # their ids, so they are kept alive and a new object can never be mistaken for an old one at the same address
+        # The graphs' revisions change whenever they are edited in any way
+        walls = self.__current_floor.walls
+        if self.__current_stage >= self.NAV_GRAPH_TWEAKING:
+            nav_graph = self.__current_nav_mesh.nav_graph
+            nav_graph_state = (nav_graph, nav_graph.revision)
+        else:
+            nav_graph_state = None
+        return (self.__current_stage, self.__current_floor_num, walls, walls.revision,
+                tuple(self.__current_floor.links), nav_graph_state, self.__start_floor_num, self.__start_pos,
+                self.__goal_floor_num, self.__goal_pos, self.__path, self.__active_tool, self.__prev_click_pos,
+                self.__options[self.ENABLE_GRID], self.__options[self.GRID_SIZE_X], self.__options[self.GRID_SIZE_Y],
+                self.__options[self.SMOOTH_FINAL_PATH])
+
+    def __weight_label(self, weight):
+        # Text displayed for a weight on the nav graph; weights are stored as a tenth of what is displayed
+        if weight not in self.__weight_labels:
+            self.__weight_labels[weight] = str(round(weight * 10, 2))
+        return self.__weight_labels[weight]
 
     @staticmethod
+    @lru_cache(maxsize=128)
     def __solve_coefficients(values):
-        cubic_coefficients = list(None for _ in range(len(values) - 1))
-        terms = len(values) * 4 - 4
-        coefficients = []
+        # values must be a tuple so the solved coefficients can be cached and reused when the same spline is redrawn
+        # Finds the natural cubic spline through values, as a cubic for each pair of neighbouring values which goes from
+        # the first value to the second as t goes from 0 to 1
+        # Once the second derivative at each value is known, every cubic follows straight from it and its two values.
+        # Each second derivative only depends on its neighbours', so (unlike solving for every coefficient at once) they
+        # are found from a tridiagonal system which the Thomas algorithm solves in one pass forwards and one back
+        # float64 is given explicitly so the spline is never worked out with integers, whatever values holds
+        values = array(values, dtype=float64)
+        second_derivs = [0.0] * len(values)
+        # Require starting and ending second derivatives = 0, so only the ones between are unknown
+        # Requiring the first and second derivatives of neighbouring cubics to match where they meet gives, for each
+        # of those second derivatives M{n}, M{n-1} + 4M{n} + M{n+1} = 6(y{n+1} - 2y{n} + y{n-1})
+        # The right hand sides are found for every equation at once with NumPy; only the sweeps have to be done in turn
+        equation_results = (6 * (values[2:] - 2 * values[1:-1] + values[:-2])).tolist()
+        upper_factors = []
         results = []
-        for vert_num in range(0, len(values) - 1):
-            coefficient_index = vert_num * 4
-            # Require F{n}(x{n}) = y{n}
-            coefficients.append(list(list(0 for _ in range(coefficient_index)) + [vert_num ** 3,
-                                                                                  vert_num ** 2,
-                                                                                  vert_num, 1] +
-                                     list(0 for _ in range(terms - coefficient_index - 4))))
-            results.append(values[vert_num])
-            # Require F{n}(x{n+1}) = y{n+1}
-            coefficients.append(list(list(0 for _ in range(coefficient_index)) + [(vert_num + 1) ** 3,
-                                                                                  (vert_num + 1) ** 2,
-                                                                                  (vert_num + 1), 1] +
-                                     list(0 for _ in range(terms - coefficient_index - 4))))
-            results.append(values[vert_num + 1])
-            if vert_num != len(values) - 2:
-                # Require F{n}'(x{n+1}) = F{n+1}'(x{n+1})
-                coefficients.append(list(list(0 for _ in range(coefficient_index))
-                                         + [3 * (vert_num + 1) ** 2,
-                                            2 * (vert_num + 1),
-                                            1, 0]
-                                         + [-3 * (vert_num + 1) ** 2,
-                                            -2 * (vert_num + 1),
-                                            -1, 0] +
-                                         list(0 for _ in range(terms - coefficient_index - 8))))
-                results.append(0)
-                # Require F{n}''(x{n+1}) = F{n+1}''(x{n+1})
-                coefficients.append(list(list(0 for _ in range(coefficient_index))
-                                         + [6 * (vert_num + 1),
-                                            2, 0, 0]
-                                         + [-6 * (vert_num + 1),
-                                            -2, 0, 0] +
-                                         list(0 for _ in range(terms - coefficient_index - 8))))
-                results.append(0)
-        # Require starting second derivative = 0
-        coefficients.append(list([0, 2, 0, 0] + list(0 for _ in range(terms - 4))))
-        results.append(0)
-        # Require ending second derivative = 0
-        coefficients.append(list(list(0 for _ in range(terms - 4)) + [6 * (len(values)-1), 2, 0, 0]))
-        results.append(0)
-        # Solve equations by finding the inverse matrix (could implement my own matrix and the Gauss-Jordan elimination
-        # algorithm but I am running out of time so NumPy to the rescue!)
-        coefficients_array = array(coefficients)
-        results_array = array(results)
-        inverse_coefficients = linalg.inv(coefficients_array)
-        solutions = dot(inverse_coefficients, results_array)
-        for solution_num in range(0, solutions.size, 4):
-            cubic_coefficients[solution_num // 4] = [solutions[solution_num],
-                                                     solutions[solution_num + 1],
-                                                     solutions[solution_num + 2],
-                                                     solutions[solution_num + 3]]
+        upper_factor = 0
+        result = 0
+        for vert_num in range(1, len(values) - 1):
+            # Eliminate M{n-1} using the previous equation
+            divisor = 4 - upper_factor
+            upper_factor = 1 / divisor
+            result = (equation_results[vert_num - 1] - result) / divisor
+            upper_factors.append(upper_factor)
+            results.append(result)
+        for vert_num in range(len(values) - 2, 0, -1):
+            second_derivs[vert_num] = results[vert_num - 1] - upper_factors[vert_num - 1] * second_derivs[vert_num + 1]
+        # The coefficients of every cubic are found at once with NumPy, as a row of the array for each cubic
+        second_derivs = array(second_derivs, dtype=float64)
+        cubic_coefficients = stack(((second_derivs[1:] - second_derivs[:-1]) / 6,
+                                    second_derivs[:-1] / 2,
+                                    (values[1:] - values[:-1]) - (2 * second_derivs[:-1] + second_derivs[1:]) / 6,
+                                    values[:-1]), axis=1)
+        # Read only, so the cached coefficients cannot be changed
+        cubic_coefficients.flags.writeable = False
         return cubic_coefficients
 
-    def __draw_cubic_spline(self, control_verts, accuracy=10):
-        x_coefficients = self.__solve_coefficients(list(map(lambda vert: vert.x, control_verts)))
-        y_coefficients = self.__solve_coefficients(list(map(lambda vert: vert.y, control_verts)))
-        to_draw = []
-        for cubic_num in range(len(control_verts)-1):
-            for interval in range(0, accuracy):
-                walls_copy = deepcopy(self.__current_floor.walls)
-                start_t = cubic_num + (interval / accuracy)
-                end_t = cubic_num + ((interval+1) / accuracy)
-                start_pos = Vec2D(self.__evaluate_cubic(start_t, x_coefficients[cubic_num]),
-                                  self.__evaluate_cubic(start_t, y_coefficients[cubic_num]))
-                end_pos = Vec2D(self.__evaluate_cubic(end_t, x_coefficients[cubic_num]),
-                                self.__evaluate_cubic(end_t, y_coefficients[cubic_num]))
-                walls_copy.add_vertex(start_pos)
-                walls_copy.add_vertex(end_pos)
-                if Floor.check_for_intersections(walls_copy, walls_copy.vertices-1, walls_copy.vertices-2,
-                                                 skip_case_1=True) and accuracy < 20:
-                    control_verts = control_verts[0:cubic_num+1] + [
-                                     Vec2D.add(Vec2D(self.__evaluate_cubic(cubic_num, x_coefficients[cubic_num]),
-                                                     self.__evaluate_cubic(cubic_num, y_coefficients[cubic_num])),
-                                               Vec2D(self.__evaluate_cubic(cubic_num+1, x_coefficients[cubic_num]),
-                                                     self.__evaluate_cubic(cubic_num+1, y_coefficients[cubic_num]))
-                                               ).scalar_multiply(0.5)] + control_verts[cubic_num+1::]
-                    self.__draw_cubic_spline(control_verts, accuracy=accuracy+1)
-                    return
-                to_draw.append((start_pos, end_pos))
-        for each_num in range(len(to_draw)):
-            if each_num % accuracy == 0:
-                self.add_canvas_line(to_draw[each_num][0], to_draw[each_num][1], dash=(2,), arrow=LAST)
-            else:
-                self.add_canvas_line(to_draw[each_num][0], to_draw[each_num][1], dash=(2,))
-
-    @staticmethod
-    def __evaluate_cubic(x, coefficients):
-        return coefficients[0] * x ** 3 + coefficients[1] * x ** 2 + coefficients[2] * x + coefficients[3]
+    def __draw_cubic_spline(self, control_positions):
+        # control_positions is an (n, 2) array of the positions the spline goes through
+        # The points on the spline only depend on the path and the walls, and walls cannot be edited while there is a
+        # path, so the points are kept until find_path finds a new one rather than being found again on every redraw
+        spline_key = (self.__current_floor_num, control_positions.tobytes())
+        if spline_key not in self.__spline_points:
+            self.__spline_points[spline_key] = self.__find_spline_points(control_positions)
+        for cubic_points in self.__spline_points[spline_key]:
+            # The first segment of each cubic has an arrow to show the direction, and the rest of the cubic is drawn as
+            # one line
+            self.add_canvas_polyline(cubic_points[:2], dash=(2,), arrow=LAST)
+            self.add_canvas_polyline(cubic_points[1:], dash=(2,))
+
+    def __find_spline_points(self, control_positions, accuracy=10):
+        # Returns the points to draw for each cubic of the spline through control_positions, adding more control
+        # positions wherever the spline would cross a wall
+        # This is a loop rather than recursion, with each pass having one more control position and accuracy than the
+        # last. Adding a control position changes the whole spline, so every pass has to start again from scratch
+        while True:
+            x_coefficients = self.__solve_coefficients(tuple(control_positions[:, 0].tolist()))
+            y_coefficients = self.__solve_coefficients(tuple(control_positions[:, 1].tolist()))
+            to_draw = []
+            # Every cubic is evaluated at the same values of t
+            ts = arange(accuracy + 1) / accuracy
+            for cubic_num in range(len(control_positions)-1):
+                # Each segment ends where the next one starts, so every point on the cubic is only evaluated once
+                # NumPy evaluates the cubic at every t at once
+                # The points are kept as an (accuracy + 1, 2) array, which the canvas converts all at once when drawing
+                cubic_points = stack((polyval(x_coefficients[cubic_num], ts), polyval(y_coefficients[cubic_num], ts)),
+                                     axis=1)
+                to_draw.append(cubic_points)
+            if accuracy >= 20:
+                # Past this the spline is drawn even if it does cross a wall, so there is no point checking
+                return to_draw
+            # Every segment of the whole spline is checked against the floor's walls at once, rather than one at a time
+            segment_starts = concatenate([cubic_points[:-1] for cubic_points in to_draw])
+            segment_ends = concatenate([cubic_points[1:] for cubic_points in to_draw])
+            intersecting = flatnonzero(Floor.check_segments_for_intersections(self.__current_floor.walls,
+                                                                              segment_starts, segment_ends))
+            if intersecting.size == 0:
+                return to_draw
+            # A control position is added halfway along the first cubic that crosses a wall. Each cubic starts and ends
+            # at its control positions, so they are used directly rather than evaluating the cubic there
+            cubic_num = intersecting[0] // accuracy
+            midpoint = (control_positions[cubic_num] + control_positions[cubic_num + 1]) * 0.5
+            control_positions = insert(control_positions, cubic_num + 1, midpoint, axis=0)
+            accuracy += 1
 
     def refresh_canvas(self):
-        self.__canvas.delete("all")
-        self.__canvas.create_line(0, 0, self.resolution.x, 0, width=5)
+        # Moves and rescales everything already on the canvas to fit the current resolution
+        self.__canvas.coords(self.__canvas_border, 0, 0, self.resolution.x, 0)
         for each in self.__canvas_widget_data:
             each.draw_scaled(self, self.__canvas)
 
@@ -713,6 +915,7 @@ class Manager:
         if self.__start_pos is not None and self.__goal_pos is not None:
             self.__map.reset_nav_meshes()
             self.__path = None
+            self.__spline_points.clear()
             self.__path = self.__map.pathfind(self.__start_pos, self.__start_floor_num, self.__goal_pos,
                                               self.__goal_floor_num, self.__options[self.PRIMARY_ALGORITHM],
                                               self.__options[self.LINK_ALGORITHM], self.__options[self.LINK_WEIGHT]/10,
@@ -727,20 +930,22 @@ class Manager:
     def map_to_canvas_space(self, point):
         # Converts from a vector position with components ranging between bounds of CANVAS_SCALE_RESOLUTION to a canvas
         # space pixel coordinate
-        scaled_pos = point.scalar_multiply(self.min_canvas_scale * self.CANVAS_SCALE)
-        offset = Vec2D.sub(Vec2D(self.resolution.x, self.resolution.y * 6 / 7),
-                           GlobalConstants.FLOOR_RATIO.scalar_multiply(self.min_canvas_scale * self.CANVAS_SCALE)
-                           ).scalar_multiply(1 / 2)
-        return Vec2D.add(scaled_pos, offset)
+        return Vec2D(*self.map_to_canvas_space_xy(point))
+
+    def map_to_canvas_space_xy(self, point):
+        # Same as map_to_canvas_space but returns an (x, y) tuple, so drawing does not need to create a Vec2D
+        return (point.x * self.__canvas_space_scale + self.__canvas_space_offset.x,
+                point.y * self.__canvas_space_scale + self.__canvas_space_offset.y)
+
+    def map_array_to_canvas_space(self, points):
+        # Same as map_to_canvas_space but for an (n, 2) array of points, which are all converted at once with NumPy
+        return points * self.__canvas_space_scale + (self.__canvas_space_offset.x, self.__canvas_space_offset.y)
 
     def map_to_normalised(self, point):
         # Converts from a canvas space pixel coordinate to a position vector with components ranging between bounds of
         # CANVAS_SCALE_RESOLUTION
-        offset = Vec2D.sub(Vec2D(self.resolution.x, self.resolution.y * 6 / 7),
-                           GlobalConstants.FLOOR_RATIO.scalar_multiply(self.min_canvas_scale * self.CANVAS_SCALE)
-                           ).scalar_multiply(1 / 2)
-        offset_pos = Vec2D.sub(point, offset)
-        return offset_pos.scalar_multiply(1 / (self.min_canvas_scale * self.CANVAS_SCALE))
+        offset_pos = Vec2D.sub(point, self.__canvas_space_offset)
+        return offset_pos.scalar_multiply(1 / self.__canvas_space_scale)
 
     def open_options(self):
         if self.__new_options is not None:
@@ -816,7 +1021,10 @@ class Manager:
                         "Settings:\n\n"
                         "'Precomp Link Dist' determines whether paths between every pair of links on the same floor are"
                         " precomputed and stored or if they are just verified to be accessible and then a distance "
-                        "heuristic is used instead.\n"
+                        "heuristic is used instead. It has no effect when the Link Algorithm is BFS, which ignores the "
+                        "distances anyway, so links are always just verified to be accessible (this means links on the "
+                        "same floor sharing an ID that are closer together than the link weight are walked between "
+                        "rather than counted as moving between links).\n"
                         "'Smooth Path' determines whether the final path is smoothed using cubic spline interpolation."
                         "'Link Algorithm' determines the graph search algorithm used for pathfinding on the link graph "
                         "to find paths between floors."
@@ -947,7 +1155,11 @@ class OptionsManager:
                                       font="TkDefaultFont 12")
         self.__cancel_button.place(anchor="center", relx=7 / 48, rely=57 / 64, relwidth=5 / 24, relheight=5 / 32)
 
-        self.__window.mainloop()
+        # The window is a modal dialog over the main window, waiting until it is closed, rather than a new mainloop
+        # being started every time options are opened (which would only return when the whole program closes)
+        self.__window.transient(self.__window.master)
+        self.__window.grab_set()
+        self.__window.wait_window()
 
     def __category_change(self, _):
         self.__clear_option_widgets()
@@ -1054,7 +1266,7 @@ class OptionsManager:
         self.__vars = dict()
 
     def __apply(self):
-        self.__master.update_options(deepcopy(self.__options))
+        self.__master.update_options(self.__options.copy())
 
     def __cancel(self):
         self.__window.destroy()
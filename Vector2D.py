@@ -1,18 +1,29 @@
 from math import sqrt
+from numpy import roll
 
 
 class Vec2D:
+    # __slots__ stops every vector from needing its own dictionary of attributes; there are a lot of vectors, so this
+    # saves a lot of memory, and looking up x and y is quicker
+    __slots__ = ("x", "y")
+
     def __init__(self, x, y):
         self.x = x
         self.y = y
 
     @property
     def magnitude(self):
-        return sqrt(self.squared_magnitude)
+        # Multiplying is quicker than **, but can round very slightly differently to it, so this should not be used to
+        # work out the distances stored in the graphs (which are found with ** in the same way as distance_between)
+        x = self.x
+        y = self.y
+        return sqrt(x * x + y * y)
 
     @property
     def squared_magnitude(self):  # When above is not necessary, avoid a sqrt
-        return self.x ** 2 + self.y ** 2
+        x = self.x
+        y = self.y
+        return x * x + y * y
 
     def scalar_multiply(self, factor):
         # Returns the vector multiplied by a scalar - DOES NOT mutate the original vector
@@ -22,17 +33,29 @@ class Vec2D:
 
     def normalise(self):
         # Returns a vector with the same direction but a magnitude of 1
-        return self.scalar_multiply(1 / self.magnitude)
+        # Uses the reciprocal of the magnitude directly rather than going through scalar_multiply
+        inverse_magnitude = 1 / self.magnitude
+        return Vec2D(self.x * inverse_magnitude, self.y * inverse_magnitude)
 
     @staticmethod
     def lerp(vec1, vec2, lerp_factor):
         # Linearly interpolates between vec1 and vec2
-        return Vec2D.add(vec1.scalar_multiply(1-lerp_factor), vec2.scalar_multiply(lerp_factor))
+        # Worked out with the components directly so only the result is created, rather than a Vec2D for each step (the
+        # arithmetic is the same as multiplying each vector and adding them, so the result is exactly the same)
+        inverse_factor = 1 - lerp_factor
+        return Vec2D(vec1.x * inverse_factor + vec2.x * lerp_factor, vec1.y * inverse_factor + vec2.y * lerp_factor)
 
     @staticmethod
     def bi_lerp(vec1, vec2, vec3, vec4, lerp_factor1, lerp_factor2):
         # Bilinear interpolation
-        return Vec2D.lerp(Vec2D.lerp(vec1, vec2, lerp_factor1), Vec2D.lerp(vec3, vec4, lerp_factor1), lerp_factor2)
+        # Same as lerping between the lerps of vec1 to vec2 and vec3 to vec4, but only the result is created
+        inverse_factor1 = 1 - lerp_factor1
+        inverse_factor2 = 1 - lerp_factor2
+        x1 = vec1.x * inverse_factor1 + vec2.x * lerp_factor1
+        y1 = vec1.y * inverse_factor1 + vec2.y * lerp_factor1
+        x2 = vec3.x * inverse_factor1 + vec4.x * lerp_factor1
+        y2 = vec3.y * inverse_factor1 + vec4.y * lerp_factor1
+        return Vec2D(x1 * inverse_factor2 + x2 * lerp_factor2, y1 * inverse_factor2 + y2 * lerp_factor2)
 
     @staticmethod
     def dot_prod(vec1, vec2):
@@ -65,31 +88,48 @@ class Vec2D:
     @staticmethod
     def squared_distance_between(vec1, vec2):
         # Returns the squared distance between two position vectors
-        return Vec2D.sub(vec1, vec2).squared_magnitude
+        # Worked out from the components directly rather than creating the vector between them
+        return (vec1.x - vec2.x) ** 2 + (vec1.y - vec2.y) ** 2
 
     @staticmethod
     def distance_between(vec1, vec2):
         # Returns the distance between two position vectors
-        return Vec2D.sub(vec1, vec2).magnitude
+        return sqrt((vec1.x - vec2.x) ** 2 + (vec1.y - vec2.y) ** 2)
 
     @staticmethod
     def point_in_polygon(point_pos, polygon):
         # Finds if a Vec2D "point_pos" is in a list of Vec2Ds "polygon" that represent a convex polygon (where adjacent
         # points represent sides)
-        prev_sign = 0
-        for i in range(len(polygon)):
-            vert1_pos = polygon[i]
-            # Vert 2 must wrap back to first vertex
-            vert2_pos = polygon[(i + 1) % len(polygon)]
-            edge_vec = Vec2D.sub(vert2_pos, vert1_pos)
-            point_vec = Vec2D.sub(point_pos, vert1_pos)
-            if prev_sign == 0:
-                prev_sign = Vec2D.perp_dot_prod(edge_vec, point_vec)
-            elif prev_sign * Vec2D.perp_dot_prod(edge_vec, point_vec) < 0:
-                # If the signs are opposite, the product will be negative and therefore < 0 and the point will not be
-                # inside the polygon
-                return False
-        return True
+        return Vec2D.point_in_polygon_xy(point_pos.x, point_pos.y, [vert_pos.x for vert_pos in polygon],
+                                         [vert_pos.y for vert_pos in polygon])
+
+    @staticmethod
+    def point_in_polygon_xy(point_x, point_y, polygon_xs, polygon_ys):
+        # Same as point_in_polygon but takes plain coordinates, with the polygon as a list of x coordinates and a list
+        # of y coordinates, so a polygon that is checked many times does not need a list of Vec2Ds making every time
+        # and no Vec2Ds are created for each side
+        # The perpendicular product of each edge vector and the vector from its first vertex to the point is found for
+        # every edge first (vert 2 of the last edge wraps back to the first vertex)
+        # The point is inside if none of them have opposite signs, so rather than comparing each sign with the last,
+        # the point is inside if they are all >= 0 or all <= 0
+        # The vertices are paired up with the next ones by zipping with the lists shifted round by one, so nothing has
+        # to be indexed or wrapped with % for each side
+        signs = [(vert2_x - vert1_x) * (point_y - vert1_y) - (vert2_y - vert1_y) * (point_x - vert1_x)
+                 for vert1_x, vert1_y, vert2_x, vert2_y in zip(polygon_xs, polygon_ys, polygon_xs[1:] + polygon_xs[:1],
+                                                               polygon_ys[1:] + polygon_ys[:1])]
+        return min(signs) >= 0 or max(signs) <= 0
+
+    @staticmethod
+    def point_in_polygons_xy(point_x, point_y, polygons_xs, polygons_ys):
+        # Same as point_in_polygon_xy but checks the point against lots of polygons at once with NumPy, returning an
+        # array of whether it is in each one. The polygons are given as 2D arrays of coordinates with a row for each
+        # polygon; polygons with fewer vertices than the rest must be padded by repeating their last vertex, which only
+        # adds sides with no length (whose perpendicular products are 0 and so do not change the result)
+        next_xs = roll(polygons_xs, -1, axis=1)
+        next_ys = roll(polygons_ys, -1, axis=1)
+        signs = (next_xs - polygons_xs) * (point_y - polygons_ys) - (next_ys - polygons_ys) * (point_x - polygons_xs)
+        # Like point_in_polygon_xy, the point is only outside a polygon if some of the signs are opposite
+        return ~((signs > 0).any(1) & (signs < 0).any(1))
 
     @staticmethod
     def intersect(line1_start, line1_end, line2_start, line2_end):
@@ -112,14 +152,15 @@ class Vec2D:
         if line1_min_y >= line2_max_y or line1_max_y <= line2_min_y:
             # Y ranges of line segments do not overlap so no intersection
             return False, None
-        line1_vec = Vec2D.sub(line1_end, line1_start)
-        line2_vec = Vec2D.sub(line2_end, line2_start)
-        if line1_vec.x == 0 or line2_vec.x == 0:
+        # The vectors along the lines are only used component-wise, so no Vec2Ds are created for them
+        line1_vec_x = line1_end.x - line1_start.x
+        line2_vec_x = line2_end.x - line2_start.x
+        if line1_vec_x == 0 or line2_vec_x == 0:
             # Line segments are vertical, x and y ranges already confirmed to intersect so lines must intersect
             return True, None
         # Rise over run
-        line1_grad = line1_vec.y / line1_vec.x
-        line2_grad = line2_vec.y / line2_vec.x
+        line1_grad = (line1_end.y - line1_start.y) / line1_vec_x
+        line2_grad = (line2_end.y - line2_start.y) / line2_vec_x
         # Extrapolate from start pos to x=0
         line1_intercept = line1_start.y - line1_start.x * line1_grad
         line2_intercept = line2_start.y - line2_start.x * line2_grad
@@ -150,40 +191,43 @@ class Vec2D:
         # The solution is valid
         return True, Vec2D(intersect_x, intersect_y)
 
-    @classmethod
-    def get_closest_point(cls, wall_start_pos, wall_end_pos, point_pos):
+    @staticmethod
+    def get_closest_point(wall_start_pos, wall_end_pos, point_pos):
         # Returns the closest point to the line defined by the wall start and end position vectors if it is within the
         # line segment, otherwise returns None
-        min_x = min(wall_start_pos.x, wall_end_pos.x)
-        max_x = max(wall_start_pos.x, wall_end_pos.x)
-        min_y = min(wall_start_pos.y, wall_end_pos.y)
-        max_y = max(wall_start_pos.y, wall_end_pos.y)
-        point = cls.__get_closest_point_vector(wall_start_pos, wall_end_pos, point_pos)
-        if min_x <= point.x <= max_x and min_y <= point.y <= max_y:
-            return point
-        else:
+        closest_point = Vec2D.get_closest_point_xy(wall_start_pos.x, wall_start_pos.y, wall_end_pos.x, wall_end_pos.y,
+                                                   point_pos.x, point_pos.y)
+        if closest_point is None:
             return None
+        return Vec2D(closest_point[0], closest_point[1])
 
     @staticmethod
-    def __get_closest_point_vector(wall_start_pos, wall_end_pos, point_pos):
-        # Finds closest point on the line wall_start_pos to wall_end_pos to point_pos
-        # IMPORTANT - treats the wall as an infinite line NOT a line segment.
-        if wall_end_pos.x - wall_start_pos.x == 0:
+    def get_closest_point_xy(wall_start_x, wall_start_y, wall_end_x, wall_end_y, point_x, point_y):
+        # Same as get_closest_point but takes and returns plain coordinates (returning an (x, y) tuple) so it can be
+        # used in loops over lots of walls without creating any Vec2Ds
+        if wall_end_x - wall_start_x == 0:
             # Line is vertical
-            return Vec2D(wall_start_pos.x, point_pos.y)
-        elif wall_end_pos.y - wall_start_pos.y == 0:
+            closest_x = wall_start_x
+            closest_y = point_y
+        elif wall_end_y - wall_start_y == 0:
             # Line is horizontal
-            return Vec2D(point_pos.x, wall_start_pos.y)
-        wall_vec = Vec2D.sub(wall_end_pos, wall_start_pos)
-        # Rise over run
-        grad = wall_vec.y / wall_vec.x
-        # Extrapolate from wall start pos to x = 0
-        intercept = wall_start_pos.y - grad * wall_start_pos.x
-        # Negative reciprocal
-        perp_grad = -1 / grad
-        # Extrapolate from point pos to x = 0
-        perp_intercept = point_pos.y - perp_grad * point_pos.x
-        intersection_x = (perp_intercept - intercept) / (grad - perp_grad)
-        # Substitute into wall equation
-        intersection_y = grad * intersection_x + intercept
-        return Vec2D(intersection_x, intersection_y)
+            closest_x = point_x
+            closest_y = wall_start_y
+        else:
+            # Rise over run
+            grad = (wall_end_y - wall_start_y) / (wall_end_x - wall_start_x)
+            # Extrapolate from wall start pos to x = 0
+            intercept = wall_start_y - grad * wall_start_x
+            # Negative reciprocal
+            perp_grad = -1 / grad
+            # Extrapolate from point pos to x = 0
+            perp_intercept = point_y - perp_grad * point_x
+            closest_x = (perp_intercept - intercept) / (grad - perp_grad)
+            # Substitute into wall equation
+            closest_y = grad * closest_x + intercept
+        # The closest point on the (infinite) line only counts if it is within the line segment
+        if (min(wall_start_x, wall_end_x) <= closest_x <= max(wall_start_x, wall_end_x) and
+                min(wall_start_y, wall_end_y) <= closest_y <= max(wall_start_y, wall_end_y)):
+            return closest_x, closest_y
+        else:
+            return None